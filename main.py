@@ -1,7 +1,10 @@
 import discord, os, asyncio
 from discord.ext import commands
 from dotenv import load_dotenv
-from src.db.session import init_db
+from src.db.session import init_db, SessionLocal
+from src.services.data_loader import get_catalog, verify_images
+from src.services.player_stats import backfill_if_empty
+from src.services.achievements.progress import backfill_if_needed as backfill_achievements
 
 load_dotenv()
 TOKEN = os.getenv("TOKEN")
@@ -11,6 +14,7 @@ intents = discord.Intents.default()
 intents.message_content = True
 
 bot = commands.Bot(command_prefix=None, intents=intents)
+_images_checked = False
 
 EXTENSIONS = [
     "src.cogs.player",
@@ -21,6 +25,7 @@ EXTENSIONS = [
     "src.cogs.stats",
     "src.cogs.equipment",
     "src.cogs.achievements",
+    "src.cogs.admin",
 ]
 
 @bot.event
@@ -40,8 +45,23 @@ async def on_ready():
     except Exception as e:
         print("Error sync:", e)
 
+    # Verificación de imágenes en segundo plano (una vez, ya con el bot online)
+    global _images_checked
+    if not _images_checked:
+        _images_checked = True
+        missing = await asyncio.to_thread(verify_images, get_catalog())
+        if missing:
+            print(f"Imágenes no encontradas ({len(missing)}): {missing}")
+
 async def main():
     init_db()
+    catalog = get_catalog()  # una sola carga del catálogo, compartida por todos los cogs
+    with SessionLocal() as db:
+        # Primera vez con player_stats: se arma desde el historial existente
+        backfill_if_empty(db, catalog.banner_key)
+        # Progreso de logros por eventos: los nuevos o cambiados se calculan desde los contadores
+        backfill_achievements(db)
+        db.commit()
     for ext in EXTENSIONS:
         await bot.load_extension(ext)
     await bot.start(TOKEN)
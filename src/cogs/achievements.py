@@ -1,16 +1,18 @@
 import discord
+from datetime import datetime, timezone
 from discord import app_commands
 from discord.ext import commands
-from sqlalchemy import select
-from ..db.session import SessionLocal
-from ..db.models import Player, AchievementState
-from ..services.achievements.catalog import load_catalog
-from ..services.achievements.repository import claimed_ids, get_achievement_row
-from ..services.achievements.evaluators import is_completed
-from ..services.achievements.rewards import apply_rewards
+from ..db.session import run_db
+from ..db.writer import run_write
+from ..db.models import Player
+from ..services.achievements.progress import (
+    achievements, backfill_if_needed, claim_ready, load_states,
+    publish_achievements, reload_achievements
+)
+from ..services.achievements.evaluators import need
+from ..services.achievements.rewards import describe_rewards, grant_rewards
 from ..util.embeds_achievements import make_achievements_embed
 
-CATALOG = load_catalog()
 PER_PAGE = 20
 
 def _page_count(n: int, per_page: int = PER_PAGE) -> int:
@@ -21,16 +23,44 @@ def _slice(items, page_idx: int, per_page: int = PER_PAGE):
     return items[s:s+per_page]
 
 def _compute_status(db, uid: str):
-    already = claimed_ids(db, uid)
+    # Una lectura indexada de achievement_state: el progreso ya lo mantienen los eventos
+    return _status_items(load_states(db, uid))
+
+def _status_items(states):
     items = []
-    for a in CATALOG.achievements:
-        if a.id in already:
+    for a in achievements():
+        progress, completed_at, claimed_at = states.get(a.id, (0, None, None))
+        if claimed_at is not None:
             items.append({"id": a.id, "name": a.name, "desc": a.desc, "state": "claimed", "progress": None})
         else:
-            done, prog = is_completed(db, uid, a)
-            items.append({"id": a.id, "name": a.name, "desc": a.desc, "state": "ready" if done else "locked", "progress": prog})
+            state = "ready" if completed_at is not None else "locked"
+            items.append({"id": a.id, "name": a.name, "desc": a.desc, "state": state, "progress": f"{progress}/{need(a)}"})
     return items
 
+def _status_if_registered(db, uid: str):
+    if not db.get(Player, uid):
+        return None
+    return _compute_status(db, uid)
+
+def _claim_all(db, uid: str):
+    """
+    None si no está registrado; si no, (resúmenes de lo reclamado, estado para redibujar).
+    Una lectura de estados, un UPDATE condicional para reclamar y uno solo de currencies.
+    """
+    if not db.get(Player, uid):
+        return None
+
+    states = load_states(db, uid)
+    now = datetime.now(timezone.utc)
+    claimed = claim_ready(db, uid, now)
+    grant_rewards(db, uid, (a.rewards for a in claimed))
+    for a in claimed:
+        progress, completed_at, _ = states[a.id]
+        states[a.id] = (progress, completed_at, now)
+
+    summaries = [f"• {a.name}: {describe_rewards(a.rewards)}" for a in claimed]
+    return summaries, _status_items(states)
+
 class AchievementsView(discord.ui.View):
     def __init__(self, user_id: str, page_idx: int = 0, timeout: float = 300):
         super().__init__(timeout=timeout)
@@ -48,19 +78,17 @@ class AchievementsView(discord.ui.View):
         self.next_button.disabled = (self.page_idx >= total_pages - 1)
         self.claim_button.disabled = (not has_ready)
 
-    async def _render(self, interaction: discord.Interaction):
-        uid = self.user_id
-        with SessionLocal() as db:
-            items = _compute_status(db, uid)
-
-        total = len(items)
-        total_pages = _page_count(total, PER_PAGE)
+    def _page_embed(self, user, items) -> discord.Embed:
+        total_pages = _page_count(len(items), PER_PAGE)
         self.page_idx = max(0, min(self.page_idx, total_pages - 1))
         page_items = _slice(items, self.page_idx, PER_PAGE)
         has_ready = any(it["state"] == "ready" for it in items)
         self._refresh_buttons_state(total_pages, has_ready)
+        return make_achievements_embed(user, page_items, self.page_idx, total_pages)
 
-        embed = make_achievements_embed(interaction.user, page_items, self.page_idx, total_pages)
+    async def _render(self, interaction: discord.Interaction):
+        items = await run_db(_compute_status, self.user_id)
+        embed = self._page_embed(interaction.user, items)
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="◀️ Anterior", style=discord.ButtonStyle.secondary, disabled=True)
@@ -77,33 +105,13 @@ class AchievementsView(discord.ui.View):
 
         await interaction.response.defer(ephemeral=True)
         uid = self.user_id
-        from datetime import datetime, timezone
-        summaries = []
-        claimed = 0
-
-        with SessionLocal() as db:
-            p = db.get(Player, uid)
-            if not p:
-                return await interaction.followup.send("Usá /register primero.", ephemeral=True)
-
-            now = datetime.now(timezone.utc)
-            for a in CATALOG.achievements:
-                row = get_achievement_row(db, uid, a.id)
-                if row and row.claimed_at is not None:
-                    continue
-                done, _ = is_completed(db, uid, a)
-                if not done:
-                    continue
-
-                summaries.append(f"• {a.name}: {apply_rewards(db, p, a.rewards)}")
-                if row is None:
-                    db.add(AchievementState(player_id=uid, achievement_id=a.id, claimed_at=now))
-                else:
-                    row.claimed_at = now
-                claimed += 1
-            db.commit()
-
-        if claimed == 0:
+
+        result = await run_write(_claim_all, uid)
+        if result is None:
+            return await interaction.followup.send("Usá /register primero.", ephemeral=True)
+        summaries, items = result
+
+        if not summaries:
             await interaction.followup.send("No tenés recompensas pendientes.", ephemeral=True)
         else:
             await interaction.followup.send(
@@ -111,16 +119,8 @@ class AchievementsView(discord.ui.View):
                 ephemeral=True
             )
 
-        # refrescar original
-        with SessionLocal() as db:
-            items = _compute_status(db, uid)
-        total = len(items)
-        total_pages = _page_count(total, PER_PAGE)
-        self.page_idx = max(0, min(self.page_idx, total_pages - 1))
-        page_items = _slice(items, self.page_idx, PER_PAGE)
-        has_ready = any(it["state"] == "ready" for it in items)
-        self._refresh_buttons_state(total_pages, has_ready)
-        embed = make_achievements_embed(interaction.user, page_items, self.page_idx, total_pages)
+        # refrescar original con el estado que ya devolvió el reclamo
+        embed = self._page_embed(interaction.user, items)
         await interaction.edit_original_response(embed=embed, view=self)
 
     @discord.ui.button(label="Siguiente ▶️", style=discord.ButtonStyle.secondary, disabled=True)
@@ -133,14 +133,25 @@ class AchievementsView(discord.ui.View):
 class AchievementsSlash(commands.Cog):
     def __init__(self, bot): self.bot = bot
 
+    def prepare_catalog(self, catalog):
+        # achievements.json entra en el hash del catálogo: se relee junto con el resto,
+        # así un archivo inválido frena la recarga antes de cambiar nada
+        return reload_achievements()
+
+    def apply_catalog(self, catalog, index):
+        publish_achievements(index)
+
+    @commands.Cog.listener()
+    async def on_catalog_reload(self, catalog):
+        # ya publicado: se recalculan los logros nuevos o cambiados
+        await run_write(backfill_if_needed)
+
     @app_commands.command(name="achievements", description="Lista tus logros, con paginado y botón para reclamar.")
     async def achievements(self, interaction: discord.Interaction):
         uid = str(interaction.user.id)
-        with SessionLocal() as db:
-            p = db.get(Player, uid)
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
-            items = _compute_status(db, uid)
+        items = await run_db(_status_if_registered, uid)
+        if items is None:
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
 
         total = len(items)
         total_pages = _page_count(total, PER_PAGE)
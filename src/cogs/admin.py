@@ -0,0 +1,96 @@
+import os, time, asyncio, discord
+from discord import app_commands
+from discord.ext import commands, tasks
+from ..services.data_loader import reload_catalog, publish_catalog, data_hash
+
+# Segundos entre chequeos de los JSON del catálogo (0 = sin watcher)
+CATALOG_WATCH_SECONDS = float(os.getenv("CATALOG_WATCH_SECONDS", "0"))
+
+def _format_diff(diff: dict[str, list[str]]) -> str:
+    if not diff:
+        return "Sin cambios."
+    lines = []
+    for section, changes in diff.items():
+        lines.append(f"**{section}:** {', '.join(changes)}")
+    return "\n".join(lines)
+
+def _prepare(cogs):
+    """
+    Fuera del loop: reconstruye el catálogo y corre los prepare_catalog de los cogs
+    (ej. GachaService). Acá va todo lo que puede fallar; ningún cog cambió todavía.
+    Devuelve (catálogo nuevo, diff, [(cog, lo que preparó)]).
+    """
+    new, diff = reload_catalog()
+    prepared = [
+        (cog, cog.prepare_catalog(new) if hasattr(cog, "prepare_catalog") else None)
+        for cog in cogs
+    ]
+    return new, diff, prepared
+
+class AdminCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._reload_lock = asyncio.Lock()
+        self._last_hash: str | None = None
+        if CATALOG_WATCH_SECONDS > 0:
+            self.watch_catalog.change_interval(seconds=CATALOG_WATCH_SECONDS)
+            self.watch_catalog.start()
+
+    def cog_unload(self):
+        self.watch_catalog.cancel()
+
+    async def reload(self) -> str:
+        """
+        Recarga todo o nada: primero se prepara fuera del event loop lo que depende del
+        catálogo nuevo; si algo falla no se cambió nada. Después cada cog hace su
+        apply_catalog (solo asignaciones, sin awaits en el medio) y se publica en
+        get_catalog. Lo que se hace después (y puede esperar) escucha
+        'catalog_reload'. Las tiradas en curso siguen con la referencia que ya
+        tenían; las nuevas usan el catálogo nuevo.
+        """
+        async with self._reload_lock:
+            self._last_hash = await asyncio.to_thread(data_hash)
+            cogs = [cog for cog in self.bot.cogs.values() if hasattr(cog, "apply_catalog")]
+            t0 = time.perf_counter()
+            catalog, diff, prepared = await asyncio.to_thread(_prepare, cogs)
+            t1 = time.perf_counter()
+            for cog, state in prepared:
+                cog.apply_catalog(catalog, state)
+            publish_catalog(catalog)
+            t2 = time.perf_counter()
+        self.bot.dispatch("catalog_reload", catalog)
+        return (
+            f"{_format_diff(diff)}\n"
+            f"*Build: {(t1 - t0) * 1000:.1f} ms • Aplicado: {(t2 - t1) * 1000:.1f} ms*"
+        )
+
+    @app_commands.command(name="reload_catalog", description="Recarga banners, personajes, conos y logros sin reiniciar.")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def reload_catalog_cmd(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            report = await self.reload()
+        except Exception as e:
+            return await interaction.followup.send(f"⚠️ No se recargó el catálogo: {e}", ephemeral=True)
+        msg = f"Catálogo recargado.\n{report}"
+        await interaction.followup.send(msg if len(msg) < 1900 else msg[:1900], ephemeral=True)
+
+    @tasks.loop(seconds=60)
+    async def watch_catalog(self):
+        current = await asyncio.to_thread(data_hash)
+        if self._last_hash is None:
+            self._last_hash = current
+            return
+        if current == self._last_hash:
+            return
+        try:
+            report = await self.reload()
+            print(f"Catálogo recargado por cambio en disco.\n{report}")
+        except Exception as e:
+            # JSON inválido: no reintentamos el mismo contenido, esperamos otro cambio
+            self._last_hash = current
+            print(f"No se recargó el catálogo: {e}")
+
+async def setup(bot):
+    await bot.add_cog(AdminCog(bot))
\ No newline at end of file
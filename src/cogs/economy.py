@@ -2,7 +2,9 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from datetime import datetime, timedelta, timezone
-from ..db.session import SessionLocal
+from sqlalchemy import or_, select, update
+from ..db.session import run_db
+from ..db.writer import run_write
 from ..db.models import Player, Currency 
 
 DAILY_TICKETS_STANDARD = 5
@@ -17,58 +19,88 @@ def to_utc_aware(dt: datetime | None) -> datetime | None:
         return dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(timezone.utc)
 
+def _claim_daily(db, uid: str, now: datetime):
+    """Devuelve None si no está registrado, el tiempo restante si aún no pasó el cooldown,
+    o el nuevo saldo (standard, special) si reclamó."""
+    # Marca el reclamo solo si pasó el cooldown: la condición la evalúa la DB, sin carreras
+    claimed = db.execute(
+        update(Player)
+        .where(Player.user_id == uid,
+               or_(Player.last_daily_at.is_(None), Player.last_daily_at <= now - COOLDOWN))
+        .values(last_daily_at=now)
+    ).rowcount
+    if not claimed:
+        last = db.execute(select(Player.last_daily_at).where(Player.user_id == uid)).first()
+        if last is None:
+            return None
+        return max(COOLDOWN - (now - to_utc_aware(last[0])), timedelta(seconds=1))
+
+    balance = db.execute(
+        update(Currency)
+        .where(Currency.player_id == uid)
+        .values({
+            Currency.tickets_standard: Currency.tickets_standard + DAILY_TICKETS_STANDARD,
+            Currency.tickets_special: Currency.tickets_special + DAILY_TICKETS_SPECIAL,
+            Currency.version: Currency.version + 1,
+        })
+        .returning(Currency.tickets_standard, Currency.tickets_special)
+    ).first()
+    if balance is None:
+        db.add(Currency(player_id=uid, tickets_standard=DAILY_TICKETS_STANDARD,
+                        tickets_special=DAILY_TICKETS_SPECIAL, credits=0))
+        return DAILY_TICKETS_STANDARD, DAILY_TICKETS_SPECIAL
+    return tuple(balance)
+
+def _add100(db, uid: str):
+    p = db.get(Player, uid)
+    if not p:
+        return None
+    if p.currencies is None:
+        p.currencies = Currency(tickets=0, credits=0)
+    p.currencies.tickets_standard += 100
+    p.currencies.tickets_special += 100
+    return p.currencies.tickets_standard, p.currencies.tickets_special
+
+def _balance(db, uid: str):
+    p = db.get(Player, uid)
+    if not p:
+        return None
+    #if p.currencies is None:
+    #    return await interaction.reply("Sin billetera aún. Usá `!daily` primero.")
+    return p.currencies.tickets_standard, p.currencies.tickets_special, p.currencies.credits
+
 class EconomyCog(commands.Cog):
     def __init__(self, bot): self.bot = bot
 
     @app_commands.command(name="daily", description="Reclamá tus tickets diarios.")
     async def daily(self, interaction: discord.Interaction):
         now = datetime.now(timezone.utc)
-        with SessionLocal() as db:
-            p = db.get(Player, str(interaction.user.id))
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
-
-            last = to_utc_aware(p.last_daily_at)
-            if last is not None:
-                delta = now - last 
-                if delta < COOLDOWN:
-                    restante = COOLDOWN - delta
-                    h = int(restante.total_seconds() // 3600)
-                    m = int((restante.total_seconds() % 3600) // 60)
-                    return await interaction.response.send_message(f"Aún no pasaron 24h. Te faltan ~{h}h {m}m.", ephemeral=True)
-
-            if p.currencies is None:
-                p.currencies = Currency(tickets_standard=0,tickets_special=0 ,credits=0)
-
-            p.currencies.tickets_standard += DAILY_TICKETS_STANDARD
-            p.currencies.tickets_special += DAILY_TICKETS_SPECIAL
-            p.last_daily_at = now
-            db.commit()
+        res = await run_write(_claim_daily, str(interaction.user.id), now)
+        if res is None:
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
+        if isinstance(res, timedelta):
+            h = int(res.total_seconds() // 3600)
+            m = int((res.total_seconds() % 3600) // 60)
+            return await interaction.response.send_message(f"Aún no pasaron 24h. Te faltan ~{h}h {m}m.", ephemeral=True)
 
-            await interaction.response.send_message(f"¡Reclamaste {DAILY_TICKETS_STANDARD} tickets standard y {DAILY_TICKETS_SPECIAL} tickets especiales!", ephemeral=True)
+        ts, sp = res
+        await interaction.response.send_message(f"¡Reclamaste {DAILY_TICKETS_STANDARD} tickets standard y {DAILY_TICKETS_SPECIAL} tickets especiales! Ahora tenés {ts} standard y {sp} especiales.", ephemeral=True)
 
     @app_commands.command(name="add100", description="Agrega 100 tickets a tu cuenta.")
     async def add100(self, interaction: discord.Interaction):
-        with SessionLocal() as db:
-            p = db.get(Player, str(interaction.user.id))
-            if not p:
-                return await interaction.response.send_message("Usá !register primero.", ephemeral=True)
-            if p.currencies is None:
-                p.currencies = Currency(tickets=0, credits=0)
-            p.currencies.tickets_standard += 100
-            p.currencies.tickets_special += 100
-            db.commit()
-            return await interaction.response.send_message(f"¡Te di 100 tickets! Ahora tenés {p.currencies.tickets_standard} tickets standard y {p.currencies.tickets_special} tickets especiales.", ephemeral=True)
+        res = await run_write(_add100, str(interaction.user.id))
+        if not res:
+            return await interaction.response.send_message("Usá !register primero.", ephemeral=True)
+        ts, sp = res
+        return await interaction.response.send_message(f"¡Te di 100 tickets! Ahora tenés {ts} tickets standard y {sp} tickets especiales.", ephemeral=True)
 
     @app_commands.command(name="balance", description="Tu balance actual.")
     async def balance(self, interaction: discord.Interaction):
-        with SessionLocal() as db:
-            p = db.get(Player, str(interaction.user.id))
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
-            #if p.currencies is None:
-            #    return await interaction.reply("Sin billetera aún. Usá `!daily` primero.")
-            return await interaction.response.send_message(f"Tickets standard: {p.currencies.tickets_standard} — Tickets especiales: {p.currencies.tickets_special} — Créditos: {p.currencies.credits}", ephemeral=True)
+        res = await run_db(_balance, str(interaction.user.id))
+        if not res:
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
+        ts, sp, cr = res
+        return await interaction.response.send_message(f"Tickets standard: {ts} — Tickets especiales: {sp} — Créditos: {cr}", ephemeral=True)
         
     # Handler error
     @commands.Cog.listener()
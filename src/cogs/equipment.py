@@ -2,59 +2,63 @@ import os, discord
 from discord import app_commands
 from discord.ext import commands
 from sqlalchemy import select
-from ..db.session import SessionLocal
+from ..db.session import run_db
 from ..db.models import Player
-from ..services.data_loader import load_data
+from ..services.data_loader import get_catalog
 from ..services.equipment_service import EquipmentService
 from ..util.equipment_select import CharacterSelectView, UnequipCharacterSelectView
 
-characters, light_cones, _banners = load_data()
-CHAR_SET = {c.id for c in characters.characters}
-LC_SET   = {l.id for l in light_cones.light_cones}
-CHAR_META = {c.id: (c.name, c.rarity, c.path) for c in characters.characters}
-LC_META   = {l.id: (l.name, l.rarity, l.path, set(l.favorites)) for l in light_cones.light_cones}
+def _pairs(db, uid: str):
+    """None si no está registrado; si no, pares (character_id, light_cone_id)."""
+    if not db.get(Player, uid):
+        return None
+    return EquipmentService.list_pairs(db, uid)
+
+def _ownership(db, uid: str):
+    """None si no está registrado; si no, lo que posee y tiene equipado (tres consultas)."""
+    if not db.get(Player, uid):
+        return None
+    return EquipmentService.ownership(db, uid)
+
+def _equip_map(db, uid: str):
+    """None si no está registrado; si no, character_id -> light_cone_id."""
+    if not db.get(Player, uid):
+        return None
+    return EquipmentService.equip_map(db, uid)
 
 class EquipmentCogs(commands.Cog):
-    def __init__(self, bot): self.bot = bot
+    def __init__(self, bot, catalog):
+        self.bot = bot
+        self.catalog = catalog
+
+    def apply_catalog(self, catalog, prepared):
+        self.catalog = catalog
 
     @app_commands.command(name="equip_select", description="Elegí personaje y Light Cone con menús.")
     async def equip_select(self, interaction: discord.Interaction):
         uid = str(interaction.user.id)
-        with SessionLocal() as db:
-            p = db.get(Player, uid)
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
+        catalog = self.catalog
+        owned = await run_db(_ownership, uid)
+        if owned is None:
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
 
-        view = CharacterSelectView(
-            user_id=uid,
-            char_ids=list(CHAR_SET),
-            lc_ids=list(LC_SET),
-            char_meta=CHAR_META,
-            lc_meta=LC_META
-        )
+        view = CharacterSelectView(user_id=uid, catalog=catalog, owned=owned)
         await interaction.response.send_message("Elegí un personaje:", view=view, ephemeral=True)
     
     @app_commands.command(name="unequip_select", description="Quitá un Light Cone usando un selector.")
     async def unequip_select(self, interaction: discord.Interaction):
         uid = str(interaction.user.id)
-        with SessionLocal() as db:
-            p = db.get(Player, uid)
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
+        catalog = self.catalog
+        equipped = await run_db(_equip_map, uid)
+        if equipped is None:
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
 
-            pairs = EquipmentService.list_pairs(db, uid)
-
-        if not pairs:
+        view = UnequipCharacterSelectView(user_id=uid, catalog=catalog, equipped=equipped)
+        if not view.ids:
             return await interaction.response.send_message(
                 "No tenés Light Cones equipados.", ephemeral=True
             )
 
-        view = UnequipCharacterSelectView(
-            user_id=uid,
-            char_ids=list(CHAR_SET),
-            char_meta=CHAR_META,
-            lc_meta=LC_META,
-        )
         await interaction.response.send_message(
             "Elegí el personaje al que querés quitarle el Light Cone:",
             view=view,
@@ -64,19 +68,17 @@ class EquipmentCogs(commands.Cog):
     @app_commands.command(name="equipment", description="Lista tus emparejamientos Personaje ↔ Light Cone.")
     async def equipment(self, interaction: discord.Interaction):
         uid = str(interaction.user.id)
-        with SessionLocal() as db:
-            p = db.get(Player, uid)
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
-            pairs = EquipmentService.list_pairs(db, uid)
+        pairs = await run_db(_pairs, uid)
+        if pairs is None:
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
 
         if not pairs:
             return await interaction.response.send_message("No tenés equipamiento asignado.", ephemeral=True)
 
         lines = []
         for cid, lid in pairs:
-            cname, _, c_path = CHAR_META.get(cid, (cid, 0, "?"))
-            lname, _, l_path, favs = LC_META.get(lid, (lid, 0, "?", set()))
+            cname, _, c_path = self.catalog.char_meta.get(cid, (cid, 0, "?"))
+            lname, _, l_path, favs = self.catalog.lc_meta.get(lid, (lid, 0, "?", frozenset()))
             fav_tag = " ⭐" if cid in favs else ""
             lines.append(f"**{cname}**  ↔  **{lname}**{fav_tag}")
 
@@ -85,4 +87,4 @@ class EquipmentCogs(commands.Cog):
 
 
 async def setup(bot):
-    await bot.add_cog(EquipmentCogs(bot))
\ No newline at end of file
+    await bot.add_cog(EquipmentCogs(bot, get_catalog()))
\ No newline at end of file
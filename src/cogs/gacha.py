@@ -1,8 +1,9 @@
-import discord
+import asyncio, discord, weakref
 from discord import app_commands
 from discord.ext import commands
-from ..db.session import SessionLocal
-from ..services.data_loader import load_data
+from ..db.session import run_db
+from ..db.writer import run_write
+from ..services.data_loader import get_catalog
 from ..services.gacha_service import GachaService
 from ..services.gacha_draw import run_pull_transaction
 from ..util.embeds import make_pull_embed
@@ -10,19 +11,40 @@ from ..db.models import Player, GachaState
 from ..util.gacha.banner_select import BannerSelectView
 from ..util.gacha.pull_again import PullAgainView
 
-characters, light_cones, banners = load_data()
-GS = GachaService(characters, light_cones, banners)
+def _is_registered(db, uid: str) -> bool:
+    return db.get(Player, uid) is not None
+
+def _pull(db, gs, uid: str, count: int):
+    results, banner, state = run_pull_transaction(db, gs, uid, count)
+    return results, state["total_pulls"], state["achievements"]
 
 class GachaCog(commands.Cog):
-    def __init__(self, bot): self.bot = bot
+    def __init__(self, bot, catalog):
+        self.bot = bot
+        self.catalog = catalog
+        self.gs = GachaService(catalog.characters, catalog.light_cones, catalog.banners)
+        # Un lock por jugador: sus tiradas van en orden, las de otros usuarios en paralelo
+        self._player_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    def _player_lock(self, uid: str) -> asyncio.Lock:
+        lock = self._player_locks.get(uid)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._player_locks[uid] = lock
+        return lock
+
+    def prepare_catalog(self, catalog) -> GachaService:
+        # Corre fuera del loop: si las tablas son inválidas falla acá, antes de cambiar nada
+        return GachaService(catalog.characters, catalog.light_cones, catalog.banners)
+
+    def apply_catalog(self, catalog, gs: GachaService):
+        self.catalog, self.gs = catalog, gs
 
     @app_commands.command(name="set_banner", description="Cambia tu banner activo.")
     async def setbanner(self, interaction: discord.Interaction):
-        with SessionLocal() as db:
-            p = db.get(Player, str(interaction.user.id))
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
-        view = BannerSelectView(user_id=str(interaction.user.id), gs=GS)
+        if not await run_db(_is_registered, str(interaction.user.id)):
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
+        view = BannerSelectView(user_id=str(interaction.user.id), gs=self.gs)
         await interaction.response.send_message("Elegí un banner de la lista:", view=view, ephemeral=True)
 
     @app_commands.command(name="pull", description="Tirada x1.")
@@ -37,16 +59,22 @@ class GachaCog(commands.Cog):
 
     async def _send_pull(self, interaction: discord.Interaction, count: int):
         # Corre la tirada, arma embeds y SIEMPRE manda un mensaje nuevo con followup.send
+        # (referencias locales: un reload a mitad de la tirada no la afecta)
+        catalog, gs = self.catalog, self.gs
+        uid = str(interaction.user.id)
         try:
-            with SessionLocal() as db:
-                results, banner, state = run_pull_transaction(db, GS, str(interaction.user.id), count)
-                db.commit()
+            async with self._player_lock(uid):
+                results, total_pulls, completed = await run_write(_pull, gs, uid, count)
         except Exception as e:
             # error de validación, tickets, banner inactivo, etc.
             return await interaction.followup.send(str(e))
 
-        embeds, files = make_pull_embed(results, characters, light_cones)
+        # Evento para quien mantenga agregados en memoria (StatsCog): on_pulls(uid, rarezas, total)
+        self.bot.dispatch("pulls", uid, [r[0] for r in results], total_pulls)
+
+        embeds, files = make_pull_embed(results, catalog.characters, catalog.light_cones)
         again_view = PullAgainView(owner_id=str(interaction.user.id), count=count, cog=self)
-        await interaction.followup.send(embeds=embeds, files=files, view=again_view)
+        content = "\n".join(f"🏁 ¡Logro completado: **{name}**! Reclamalo en /achievements." for name in completed)
+        await interaction.followup.send(content=content or None, embeds=embeds, files=files, view=again_view)
 
-async def setup(bot): await bot.add_cog(GachaCog(bot))
\ No newline at end of file
+async def setup(bot): await bot.add_cog(GachaCog(bot, get_catalog()))
\ No newline at end of file
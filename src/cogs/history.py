@@ -2,78 +2,116 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from sqlalchemy import select, desc
-from ..db.session import SessionLocal
-from ..db.models import Player, PullHistory
-from ..services.data_loader import load_data
+from ..db.session import run_read
+from ..db.models import Player, PlayerStats, PullHistory
+from ..services.data_loader import get_catalog
 from ..util.pager import Pager
 from ..util.embeds import make_history_embed
 
-# Para resolver nombres sin acoplar a GS
-characters, light_cones, _banners = load_data()
-CHAR_MAP = {c.id: c.name for c in characters.characters}
-LC_MAP   = {l.id: l.name for l in light_cones.light_cones}
-
 PAGE_SIZE = 10
 
-def _resolve_name(item_id: str, item_type: str) -> str:
+# Para resolver nombres sin acoplar a GS
+def _resolve_name(catalog, item_id: str, item_type: str) -> str:
     if item_type == "character":
-        return CHAR_MAP.get(item_id, item_id)
-    return LC_MAP.get(item_id, item_id) + " (LC)"
+        c = catalog.char_map.get(item_id)
+        return c.name if c else item_id
+    l = catalog.lc_map.get(item_id)
+    return (l.name if l else item_id) + " (LC)"
 
-class HistoryCog(commands.Cog):
-    def __init__(self, bot): 
-        self.bot = bot
+def _history_total(db, uid: str):
+    """None si no está registrado; si no, cantidad de tiradas (contador de player_stats)."""
+    if not db.get(Player, uid):
+        return None
+    return db.execute(
+        select(PlayerStats.total_pulls).where(PlayerStats.player_id == uid)
+    ).scalar() or 0
 
-    @app_commands.command(
-        name="history",
-        description="Muestra tu historial de tiradas con paginación (10 por página)."
-    )
-    async def history(self, interaction: discord.Interaction):
-        with SessionLocal() as db:
-            p = db.get(Player, str(interaction.user.id))
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
+def _history_page(db, uid: str, before_id: int | None = None, after_id: int | None = None,
+                  offset: int = 0, oldest: bool = False, limit: int = PAGE_SIZE):
+    """
+    Una página por keyset sobre el índice (player_id, id), más recientes primero:
+    ids < before_id (página siguiente), ids > after_id (anterior), las `limit` más viejas
+    (oldest, última página) o, sin cursor, desde las más recientes salteando `offset`.
+    """
+    q = select(PullHistory.id, PullHistory.banner_id, PullHistory.rarity, PullHistory.item_id,
+               PullHistory.item_type, PullHistory.ts).where(PullHistory.player_id == uid)
+    if after_id is not None or oldest:
+        if after_id is not None:
+            q = q.where(PullHistory.id > after_id)
+        rows = db.execute(q.order_by(PullHistory.id).limit(limit)).all()
+        return rows[::-1]
+    if before_id is not None:
+        q = q.where(PullHistory.id < before_id)
+    return db.execute(q.order_by(desc(PullHistory.id)).limit(limit).offset(offset)).all()
 
-            rows = (
-                db.execute(
-                    select(PullHistory)
-                    .where(PullHistory.player_id == p.user_id)
-                    .order_by(desc(PullHistory.id))
-                )
-                .scalars()
-                .all()
-            )
+class _HistoryPages:
+    """
+    Proveedor de páginas para el Pager. Recuerda solo los ids de la última página leída:
+    las vecinas salen por keyset, la primera y la última por los extremos y un salto
+    arbitrario (no hay botón para eso) por OFFSET.
+    """
+    def __init__(self, uid: str, user, catalog, total: int):
+        self.uid, self.user, self.catalog, self.total = uid, user, catalog, total
+        self.total_pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        self._last: tuple[int, int, int] | None = None  # (página, primer id, último id)
 
-        if not rows:
-            return await interaction.response.send_message("Aún no tenés tiradas registradas.", ephemeral=True)
+    async def count_pages(self) -> int:
+        return self.total_pages
+
+    async def __call__(self, index: int) -> discord.Embed:
+        last_page = self.total_pages - 1
+        cur = self._last
+        if cur and index == cur[0] + 1:
+            rows = await run_read(_history_page, self.uid, before_id=cur[2])
+        elif cur and index == cur[0] - 1:
+            rows = await run_read(_history_page, self.uid, after_id=cur[1])
+        elif index == last_page and index > 0:
+            rows = await run_read(_history_page, self.uid, oldest=True,
+                                  limit=self.total - last_page * PAGE_SIZE)
+        else:
+            rows = await run_read(_history_page, self.uid, offset=index * PAGE_SIZE)
+        if rows:
+            self._last = (index, rows[0].id, rows[-1].id)
 
-        # Mapear a items simples
         items = [{
             "banner": r.banner_id,
             "rarity": r.rarity,
-            "name": _resolve_name(r.item_id, r.item_type),
+            "name": _resolve_name(self.catalog, r.item_id, r.item_type),
             "ts": r.ts
         } for r in rows]
+        return make_history_embed(
+            user=self.user,
+            page_items=items,
+            page_index=index,
+            total_pages=self.total_pages,
+            total_rows=self.total
+        )
+
+class HistoryCog(commands.Cog):
+    def __init__(self, bot, catalog): 
+        self.bot = bot
+        self.catalog = catalog
 
-        # Paginado
-        pages_items: list[list[dict]] = []
-        for i in range(0, len(items), PAGE_SIZE):
-            pages_items.append(items[i:i + PAGE_SIZE])
+    def apply_catalog(self, catalog, prepared):
+        self.catalog = catalog
 
-        # Embeds por página
-        embeds = [
-            make_history_embed(
-                user=interaction.user,
-                page_items=pi,
-                page_index=idx,
-                total_pages=len(pages_items),
-                total_rows=len(items)
-            )
-            for idx, pi in enumerate(pages_items)
-        ]
+    @app_commands.command(
+        name="history",
+        description="Muestra tu historial de tiradas con paginación (10 por página)."
+    )
+    async def history(self, interaction: discord.Interaction):
+        uid = str(interaction.user.id)
+        total = await run_read(_history_total, uid)
+        if total is None:
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
+
+        if not total:
+            return await interaction.response.send_message("Aún no tenés tiradas registradas.", ephemeral=True)
 
-        view = Pager(user_id=str(interaction.user.id), embeds=embeds)
-        await interaction.response.send_message(embed=embeds[0], view=view, ephemeral=True)
+        # Solo se arma la página visible (y el Pager guarda unas pocas en su LRU)
+        pages = _HistoryPages(uid, interaction.user, self.catalog, total)
+        view, embed = await Pager.open(uid, pages, pages.count_pages)
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
 async def setup(bot): 
-    await bot.add_cog(HistoryCog(bot))
+    await bot.add_cog(HistoryCog(bot, get_catalog()))
@@ -1,21 +1,29 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from sqlalchemy import select, func
-from ..db.session import SessionLocal
+from sqlalchemy import select
+from ..db.session import run_read
 from ..db.models import Player, InventoryItem
-from ..services.data_loader import load_data
-from ..util.embeds import make_inventory_embeds
+from ..services.data_loader import get_catalog
+from ..util.embeds import make_inventory_page, inventory_page_count, sort_inventory_entries
 from ..util.pager import Pager  
 
-characters, light_cones, _banners = load_data()
-
-CHAR_MAP = {c.id: (c.name, c.rarity) for c in characters.characters}
-LC_MAP   = {l.id: (l.name, l.rarity) for l in light_cones.light_cones}
+def _load_inventory(db, uid: str):
+    """None si no está registrado; si no, filas (item_id, item_type, copias)."""
+    if not db.get(Player, uid):
+        return None
+    return db.execute(
+        select(InventoryItem.item_id, InventoryItem.item_type, InventoryItem.copies)
+        .where(InventoryItem.player_id == uid)
+    ).all()
 
 class InventoryCog(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, catalog):
         self.bot = bot
+        self.catalog = catalog
+
+    def apply_catalog(self, catalog, prepared):
+        self.catalog = catalog
 
     @app_commands.command(
         name="inventory",
@@ -26,21 +34,10 @@ class InventoryCog(commands.Cog):
         owner = user or interaction.user
         target_id = str(owner.id)
 
-        with SessionLocal() as db:
-            p = db.get(Player, target_id)
-            if not p:
-                msg = "Ese usuario no está registrado." if user else "Usá /register primero."
-                return await interaction.response.send_message(msg, ephemeral=True)
-
-            rows = db.execute(
-                select(
-                    InventoryItem.item_id,
-                    InventoryItem.item_type,
-                    func.sum(InventoryItem.copies)
-                )
-                .where(InventoryItem.player_id == p.user_id)
-                .group_by(InventoryItem.item_id, InventoryItem.item_type)
-            ).all()
+        rows = await run_read(_load_inventory, target_id)
+        if rows is None:
+            msg = "Ese usuario no está registrado." if user else "Usá /register primero."
+            return await interaction.response.send_message(msg, ephemeral=True)
 
         if not rows:
             return await interaction.response.send_message(
@@ -53,12 +50,12 @@ class InventoryCog(commands.Cog):
         for item_id, item_type, total in rows:
             total = int(total)
             if item_type == "character":
-                name, rarity = CHAR_MAP.get(item_id, (item_id, 0))
+                name, rarity, _ = self.catalog.char_meta.get(item_id, (item_id, 0, "?"))
                 kind = "char"
                 e = max(0, min(6, total - 1))
                 badge = f"E{e}"
             else:
-                name, rarity = LC_MAP.get(item_id, (item_id, 0))
+                name, rarity, _, _ = self.catalog.lc_meta.get(item_id, (item_id, 0, "?", frozenset()))
                 kind = "lc"
                 s = max(1, min(5, total))
                 badge = f"S{s}"
@@ -70,15 +67,21 @@ class InventoryCog(commands.Cog):
                 "badge": badge,
             })
 
-        embeds = make_inventory_embeds(owner=owner, entries=entries)
-        
-        view = Pager(user_id=str(interaction.user.id), embeds=embeds)
+        items = sort_inventory_entries(entries)
+
+        async def get_page(index: int) -> discord.Embed:
+            return make_inventory_page(owner=owner, items=items, page_index=index)
+
+        async def count_pages() -> int:
+            return inventory_page_count(len(items))
+
+        view, embed = await Pager.open(str(interaction.user.id), get_page, count_pages)
 
         await interaction.response.send_message(
-            embed=embeds[0],
+            embed=embed,
             view=view,
             ephemeral=False  # cambialo a True si querés que sea privado
         )
 
 async def setup(bot):
-    await bot.add_cog(InventoryCog(bot))
\ No newline at end of file
+    await bot.add_cog(InventoryCog(bot, get_catalog()))
\ No newline at end of file
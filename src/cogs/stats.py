@@ -1,27 +1,81 @@
-import discord
+import asyncio, os, discord
 from discord import app_commands
 from discord.ext import commands
-from sqlalchemy import select, func, desc
-from ..db.session import SessionLocal
-from ..db.models import Player, PullHistory
+from sqlalchemy import select, func, desc, exists, literal
+from ..db.session import run_read
+from ..db.models import Player, PlayerStats
+from ..services.stats_cache import GlobalStats, StatsCache
 
 TOP_N = 20
+TOP_MAX = 100  # tope del parámetro `top` de /users = tamaño del top-k en cache
+# Cada cuánto se recalcula todo desde la DB; entre medio se actualiza con los eventos de tirada
+STATS_TTL_SECONDS = float(os.getenv("STATS_TTL_SECONDS", "300"))
+
+def _top_users(db, top: int):
+    # Ranking desde player_stats (índice por total_pulls); si sobran lugares se completan con 0 tiradas
+    rows = db.execute(
+        select(Player.name, Player.user_id, PlayerStats.total_pulls)
+        .join(Player, Player.user_id == PlayerStats.player_id)
+        .order_by(desc(PlayerStats.total_pulls))
+        .limit(top)
+    ).all()
+    if len(rows) < top:
+        rows += db.execute(
+            select(Player.name, Player.user_id, literal(0))
+            .where(~exists().where(PlayerStats.player_id == Player.user_id))
+            .limit(top - len(rows))
+        ).all()
+    return rows
+
+def _global_stats(db) -> GlobalStats:
+    # Una sola pasada sobre los contadores (el conteo de jugadores va como subconsulta)
+    row = db.execute(
+        select(
+            select(func.count(Player.user_id)).scalar_subquery(),
+            func.coalesce(func.sum(PlayerStats.total_pulls), 0),
+            func.coalesce(func.sum(PlayerStats.five_count), 0),
+            func.coalesce(func.sum(PlayerStats.four_count), 0),
+        )
+    ).one()
+    return GlobalStats(*row)
+
+def _load_stats(db, k: int):
+    return _global_stats(db), _top_users(db, k)
+
+def _player_names(db, uids: list[str]) -> dict[str, str]:
+    return dict(db.execute(select(Player.user_id, Player.name).where(Player.user_id.in_(uids))).all())
 
 class StatsCog(commands.Cog):
-    def __init__(self, bot): self.bot = bot
+    def __init__(self, bot):
+        self.bot = bot
+        self.cache = StatsCache(k=TOP_MAX, ttl=STATS_TTL_SECONDS)
+        self._refresh_lock = asyncio.Lock()
+
+    async def _fresh_cache(self) -> StatsCache:
+        if self.cache.is_stale():
+            async with self._refresh_lock:
+                if self.cache.is_stale():
+                    self.cache.load(*await run_read(_load_stats, TOP_MAX))
+        return self.cache
+
+    @commands.Cog.listener()
+    async def on_pulls(self, uid: str, rarities: list[int], total: int):
+        self.cache.apply_pulls(uid, rarities, total)
+
+    @commands.Cog.listener()
+    async def on_player_registered(self, uid: str, name: str):
+        self.cache.add_player(uid, name)
 
     @app_commands.command(name="users", description="Ranking de usuarios por cantidad de tiradas.")
     @app_commands.describe(top="Cuántos mostrar (1-100)")
-    async def users(self, interaction: discord.Interaction, top: app_commands.Range[int, 1, 100] = TOP_N):
-        with SessionLocal() as db:
-            q = (
-                select(Player.name, Player.user_id, func.count(PullHistory.id))
-                .join(PullHistory, PullHistory.player_id == Player.user_id, isouter=True)
-                .group_by(Player.user_id, Player.name)
-                .order_by(desc(func.count(PullHistory.id)))
-                .limit(top)
-            )
-            rows = db.execute(q).all()
+    async def users(self, interaction: discord.Interaction, top: app_commands.Range[int, 1, TOP_MAX] = TOP_N):
+        cache = await self._fresh_cache()
+        rows = cache.top(top)
+        missing = [uid for name, uid, _ in rows if name is None]
+        if missing:
+            # Jugadores que entraron al top por un evento de tirada: se resuelve el nombre una vez
+            cache.set_names(await run_read(_player_names, missing))
+            rows = cache.top(top)
 
         if not rows:
             return await interaction.response.send_message("No hay usuarios registrados.", ephemeral=True)
@@ -35,16 +89,12 @@ class StatsCog(commands.Cog):
 
     @app_commands.command(name="global_stats", description="Métricas globales básicas.")
     async def global_stats(self, interaction: discord.Interaction):
-        with SessionLocal() as db:
-            total_users = db.execute(select(func.count(Player.user_id))).scalar()
-            total_pulls = db.execute(select(func.count(PullHistory.id))).scalar()
-            five_count = db.execute(select(func.count()).where(PullHistory.rarity == 5)).scalar()
-            four_count = db.execute(select(func.count()).where(PullHistory.rarity == 4)).scalar()
+        g = (await self._fresh_cache()).global_stats
 
         msg = (
-            f"**Usuarios:** {total_users}\n"
-            f"**Tiradas totales:** {total_pulls}\n"
-            f"**5★:** {five_count} • **4★:** {four_count}\n"
+            f"**Usuarios:** {g.users}\n"
+            f"**Tiradas totales:** {g.pulls}\n"
+            f"**5★:** {g.five} • **4★:** {g.four}\n"
         )
         await interaction.response.send_message(msg)
 
@@ -0,0 +1,104 @@
+"""
+Benchmark de los perfiles de SQLite (SQLITE_PROFILES en db/session.py).
+
+    python -m src.db.bench_profile [--db bot.db] [--seconds 5]
+
+Trabaja sobre una copia temporal de la base. Para cada perfil mide:
+  - latencia de commit de una escritura chica (una tirada: débito + historial),
+  - lecturas tipo /inventory mientras un writer commitea sin parar.
+"""
+import argparse, os, shutil, statistics, tempfile, threading, time
+from datetime import datetime, timezone
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import sessionmaker
+from .models import Currency, InventoryItem, Player, PullHistory
+from .session import SQLITE_PROFILES, _create_engine
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def _write_pull(db, uid: str):
+    db.execute(update(Currency).where(Currency.player_id == uid)
+               .values(tickets_standard=Currency.tickets_standard + 0))
+    db.execute(PullHistory.__table__.insert(), [
+        {"player_id": uid, "banner_id": "stellar_warp", "rarity": 3, "item_id": "arrows",
+         "item_type": "light_cone", "ts": datetime.now(timezone.utc)}
+        for _ in range(10)
+    ])
+    db.commit()
+
+def _read_inventory(db, uid: str):
+    return db.execute(
+        select(InventoryItem.item_id, InventoryItem.copies).where(InventoryItem.player_id == uid)
+    ).all()
+
+def bench(path: str, profile: str, seconds: float, readers: int = 4):
+    eng = _create_engine(f"sqlite:///{path}", profile)
+    Session = sessionmaker(bind=eng, autoflush=False)
+    with Session() as db:
+        uids = list(db.execute(select(Player.user_id).limit(1000)).scalars())
+    uid = uids[0]
+
+    commits = []
+    for _ in range(200):
+        t = time.perf_counter()
+        with Session() as db:
+            _write_pull(db, uid)
+        commits.append((time.perf_counter() - t) * 1000)
+
+    stop = threading.Event()
+    reads, writes, errors = [], [0], [0]
+
+    def writer():
+        while not stop.is_set():
+            with Session() as db:
+                _write_pull(db, uid)
+            writes[0] += 1
+
+    def reader(n: int):
+        i = n
+        while not stop.is_set():
+            t = time.perf_counter()
+            try:
+                with Session() as db:
+                    _read_inventory(db, uids[i % len(uids)])
+            except Exception:
+                errors[0] += 1
+                continue
+            reads.append((time.perf_counter() - t) * 1000)
+            i += readers
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(n,)) for n in range(readers)
+    ]
+    for th in threads:
+        th.start()
+    time.sleep(seconds)
+    stop.set()
+    for th in threads:
+        th.join()
+    eng.dispose()
+
+    mode = "WAL" if profile == "wal" else "rollback"
+    print(f"[{profile}] ({mode})")
+    print(f"  commit ms   mediana {statistics.median(commits):.2f}  p99 {_pct(commits, .99):.2f}")
+    print(f"  con writer  lecturas/s {len(reads) / seconds:.0f}  p99 {_pct(reads, .99):.2f} ms  "
+          f"máx {max(reads):.1f} ms  errores {errors[0]}  commits/s {writes[0] / seconds:.0f}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default="bot.db")
+    ap.add_argument("--seconds", type=float, default=5)
+    args = ap.parse_args()
+    for profile in SQLITE_PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            shutil.copy(args.db, path)
+            # La copia puede venir en WAL de una corrida anterior: arrancar siempre en rollback
+            with _create_engine(f"sqlite:///{path}", "default").connect() as conn:
+                conn.execute(text("PRAGMA journal_mode = DELETE"))
+            bench(path, profile, args.seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from sqlalchemy import inspect, text
+
+# Migraciones idempotentes para bases ya creadas (create_all no altera tablas existentes).
+# Cada paso chequea si ya está aplicado, así que se pueden correr en cada arranque.
+
+def _add_column(conn, table: str, column: str, ddl: str):
+    cols = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in cols:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+
+def _version_columns(conn):
+    _add_column(conn, "currencies", "version", "version INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "gacha_state", "version", "version INTEGER NOT NULL DEFAULT 0")
+
+def _inventory_unique(conn):
+    # Fusiona filas duplicadas (se queda la más vieja con la suma de copias) y crea el índice único
+    if "uq_inventory_player_item" in {i["name"] for i in inspect(conn).get_indexes("inventory")}:
+        return
+    conn.execute(text("""
+        CREATE TEMP TABLE _inventory_dups AS
+        SELECT MIN(id) AS keep_id, SUM(copies) AS total FROM inventory
+        GROUP BY player_id, item_type, item_id HAVING COUNT(*) > 1
+    """))
+    conn.execute(text("""
+        UPDATE inventory SET copies = (SELECT total FROM _inventory_dups WHERE keep_id = inventory.id)
+        WHERE id IN (SELECT keep_id FROM _inventory_dups)
+    """))
+    conn.execute(text("""
+        DELETE FROM inventory WHERE id NOT IN (
+            SELECT MIN(id) FROM inventory GROUP BY player_id, item_type, item_id
+        )
+    """))
+    conn.execute(text("DROP TABLE _inventory_dups"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX uq_inventory_player_item ON inventory (player_id, item_type, item_id)"
+    ))
+
+def _history_player_id_index(conn):
+    # (player_id, id) cubre lo mismo que el índice simple de player_id y además el orden por id
+    names = {i["name"] for i in inspect(conn).get_indexes("pull_history")}
+    if "ix_pull_history_player_id_id" not in names:
+        conn.execute(text("CREATE INDEX ix_pull_history_player_id_id ON pull_history (player_id, id)"))
+    if "ix_pull_history_player_id" in names:
+        conn.execute(text("DROP INDEX ix_pull_history_player_id"))
+
+def _achievement_progress_columns(conn):
+    # Quedan en NULL hasta el backfill de progress.backfill_if_needed (necesita el catálogo de logros)
+    _add_column(conn, "achievement_state", "progress", "progress INTEGER")
+    _add_column(conn, "achievement_state", "completed_at", "completed_at DATETIME")
+
+MIGRATIONS = [
+    _version_columns,
+    _inventory_unique,
+    _history_player_id_index,
+    _achievement_progress_columns,
+]
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        for step in MIGRATIONS:
+            step(conn)
\ No newline at end of file
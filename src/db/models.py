@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey, Boolean, DateTime, UniqueConstraint, func
+from sqlalchemy import String, Integer, ForeignKey, Boolean, DateTime, UniqueConstraint, Index, func
 
 class Base(DeclarativeBase): pass
 
@@ -20,8 +20,12 @@ class Currency(Base):
     tickets_standard: Mapped[int] = mapped_column(Integer, default=0)  # Star Rail Pass
     tickets_special:  Mapped[int] = mapped_column(Integer, default=0)  # Star Rail Special Pass
     credits: Mapped[int] = mapped_column(Integer, default=0)
+    # Control optimista: cada UPDATE lleva WHERE version = :leída y la incrementa
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     player: Mapped[Player] = relationship(back_populates="currencies")
 
+    __mapper_args__ = {"version_id_col": version}
+
 class GachaState(Base):
     __tablename__ = "gacha_state"
     player_id: Mapped[str] = mapped_column(ForeignKey("players.user_id"), primary_key=True)
@@ -29,8 +33,11 @@ class GachaState(Base):
     pity4: Mapped[int] = mapped_column(Integer, default=0)
     pity5: Mapped[int] = mapped_column(Integer, default=0)
     last_5_was_featured: Mapped[bool] = mapped_column(Boolean, default=True)  # en estándar da igual
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     player: Mapped[Player] = relationship(back_populates="gacha")
 
+    __mapper_args__ = {"version_id_col": version}
+
 class InventoryItem(Base):
     __tablename__ = "inventory"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -43,10 +50,15 @@ class InventoryItem(Base):
         default=lambda: datetime.now(timezone.utc)
     )
 
+    __table_args__ = (
+        # Una fila por item y jugador; las copias se acumulan con upsert
+        Index("uq_inventory_player_item", "player_id", "item_type", "item_id", unique=True),
+    )
+
 class PullHistory(Base):
     __tablename__ = "pull_history"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    player_id: Mapped[str] = mapped_column(ForeignKey("players.user_id"), index=True, nullable=False)
+    player_id: Mapped[str] = mapped_column(ForeignKey("players.user_id"), nullable=False)
     banner_id: Mapped[str] = mapped_column(String, index=True, nullable=False)
     rarity: Mapped[int] = mapped_column(Integer, nullable=False)
     item_id: Mapped[str] = mapped_column(String, nullable=False)
@@ -57,6 +69,27 @@ class PullHistory(Base):
         default=lambda: datetime.now(timezone.utc)
     )
 
+    __table_args__ = (
+        # Historial por jugador paginado por keyset sobre id (reemplaza al índice simple de player_id)
+        Index("ix_pull_history_player_id_id", "player_id", "id"),
+    )
+
+class PlayerStats(Base):
+    # Contadores mantenidos en la misma transacción de cada tirada (ver services/player_stats.py)
+    __tablename__ = "player_stats"
+    player_id: Mapped[str] = mapped_column(ForeignKey("players.user_id"), primary_key=True)
+    total_pulls: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+    five_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    four_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_pull_at: Mapped["DateTime | None"] = mapped_column(DateTime(timezone=True), nullable=True)
+
+class PlayerBannerStats(Base):
+    # Tiradas por key de banner ("star_rail_pass" | "star_rail_special_pass")
+    __tablename__ = "player_banner_stats"
+    player_id: Mapped[str] = mapped_column(ForeignKey("players.user_id"), primary_key=True)
+    banner_key: Mapped[str] = mapped_column(String, primary_key=True)
+    pulls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
 class Equipment(Base):
     __tablename__ = "equipment"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -77,7 +110,16 @@ class AchievementState(Base):
     player_id: Mapped[str] = mapped_column(ForeignKey("players.user_id"), index=True, nullable=False)
     achievement_id: Mapped[str] = mapped_column(String, index=True, nullable=False)
     claimed_at: Mapped["DateTime"] = mapped_column(DateTime(timezone=True), nullable=True, default=None)
+    # Progreso mantenido por eventos (services/achievements/progress.py); NULL = todavía sin calcular
+    progress: Mapped[int | None] = mapped_column(Integer, nullable=True, default=0)
+    completed_at: Mapped["DateTime | None"] = mapped_column(DateTime(timezone=True), nullable=True, default=None)
 
     __table_args__ = (
         UniqueConstraint("player_id", "achievement_id", name="uq_player_achievement"),
     )
+
+class AchievementDefinition(Base):
+    # Hash de la definición (tipo + params) con la que se calculó el progreso guardado de cada logro
+    __tablename__ = "achievement_definitions"
+    achievement_id: Mapped[str] = mapped_column(String, primary_key=True)
+    def_hash: Mapped[str] = mapped_column(String, nullable=False)
@@ -1,12 +1,107 @@
-import os
-from sqlalchemy import create_engine
+import os, asyncio
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from .models import Base
+from .migrations import run_migrations
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./bot.db")
+# Hilos dedicados a la DB: el trabajo sincrónico de SQLAlchemy nunca corre en el event loop
+DB_THREADS = int(os.getenv("DB_THREADS", "4"))
+# Hilos para las consultas de solo lectura (run_read), con conexiones propias
+DB_READ_THREADS = int(os.getenv("DB_READ_THREADS", "4"))
 
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+# Perfil de SQLite aplicado en cada conexión nueva (DB_PROFILE=default deja los valores de fábrica)
+SQLITE_PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",          # los lectores no se bloquean con el writer
+        "synchronous": "NORMAL",        # en WAL solo se pierde el último commit ante un corte de luz
+        "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("DB_MMAP_MB", "256")) * 1024 * 1024,
+        "cache_size": -int(os.getenv("DB_CACHE_MB", "64")) * 1024,  # negativo = KiB
+        "temp_store": "MEMORY",
+    },
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "wal")
+
+def _read_only_url(url: str) -> str:
+    # sqlite:///archivo.db -> sqlite:///file:/ruta/abs/archivo.db?mode=ro&uri=true
+    path = os.path.abspath(make_url(url).database)
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+def _is_memory(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+def _create_engine(url: str, profile: str, pool_size: int = DB_THREADS + 1, read_only: bool = False):
+    if not url.startswith("sqlite"):
+        return create_engine(url, echo=False, future=True)
+    pragmas = dict(SQLITE_PROFILES[profile])
+    if _is_memory(url):
+        eng = create_engine(url, echo=False, future=True)
+    else:
+        if read_only:
+            url = _read_only_url(url)
+            # journal_mode es persistente y lo fija el writer; una conexión ro no puede cambiarlo
+            pragmas.pop("journal_mode", None)
+        # Por defecto una conexión por hilo del pool de la DB más la del writer, con margen para picos
+        eng = create_engine(url, echo=False, future=True,
+                            pool_size=pool_size, max_overflow=pool_size - 1)
+
+    @event.listens_for(eng, "connect")
+    def _apply_pragmas(dbapi_conn, _record):
+        # pysqlite abre y cierra transacciones por su cuenta (y no emite BEGIN antes de un
+        # SAVEPOINT, que entonces pasa a ser la transacción externa): lo apagamos y el BEGIN
+        # lo emite SQLAlchemy (evento "begin"), así los SAVEPOINT quedan anidados de verdad.
+        dbapi_conn.isolation_level = None
+        cur = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cur.execute(f"PRAGMA {name} = {value}")
+        cur.close()
+
+    @event.listens_for(eng, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return eng
+
+engine = _create_engine(DATABASE_URL, DB_PROFILE)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Engine de solo lectura (mode=ro): en WAL lee su propio snapshot sin frenar al writer.
+# Fuera de SQLite en archivo se comparte el engine principal.
+if DATABASE_URL.startswith("sqlite") and not _is_memory(DATABASE_URL):
+    read_engine = _create_engine(DATABASE_URL, DB_PROFILE, pool_size=DB_READ_THREADS, read_only=True)
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+_read_executor = ThreadPoolExecutor(max_workers=DB_READ_THREADS, thread_name_prefix="db-read")
+
 def init_db():
     Base.metadata.create_all(engine)
+    run_migrations(engine)
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Corre fn(db, *args, **kwargs) con una sesión nueva en el pool de hilos de la DB
+    y devuelve su resultado. fn debe devolver datos planos (no objetos ORM ligados
+    a la sesión, que se cierra al terminar). Para escrituras usar run_write (db/writer.py).
+    """
+    def job():
+        with SessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_db_executor, job)
+
+async def run_read(fn, *args, **kwargs):
+    """
+    Igual que run_db pero con una sesión del engine de solo lectura y en su propio
+    pool de hilos. Es para los comandos que solo consultan (/users, /global_stats,
+    /history, /inventory): cualquier escritura dentro de fn falla.
+    """
+    def job():
+        with ReadSessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_read_executor, job)
@@ -0,0 +1,15 @@
+from sqlalchemy.dialects.sqlite import insert
+
+# Único lugar atado al dialecto: INSERT ... ON CONFLICT es de SQLite (Postgres tiene
+# la misma API en sqlalchemy.dialects.postgresql.insert, para cambiarlo acá).
+
+def upsert(table, conflict_cols, update, values: dict | None = None):
+    """
+    INSERT ... ON CONFLICT (conflict_cols) DO UPDATE.
+    update(excluded) -> dict del SET, donde `excluded` son las columnas de la fila que no
+    entró. Con `values` queda una sola fila; sin ellos se ejecuta con una lista (executemany).
+    """
+    stmt = insert(table)
+    if values is not None:
+        stmt = stmt.values(**values)
+    return stmt.on_conflict_do_update(index_elements=conflict_cols, set_=update(stmt.excluded))
@@ -0,0 +1,111 @@
+import os, asyncio, queue, threading
+from concurrent.futures import Future
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+from .session import SessionLocal
+
+# Máximo de transacciones que entran en un mismo commit
+WRITER_MAX_BATCH = int(os.getenv("WRITER_MAX_BATCH", "64"))
+# Reintentos ante errores transitorios (DB ocupada o versión desactualizada)
+WRITE_RETRIES = int(os.getenv("WRITE_RETRIES", "3"))
+
+class DbWriter:
+    """
+    Escritor único de la DB (SQLite admite un solo writer a la vez).
+    Un hilo dedicado toma las transacciones encoladas y ejecuta varias en la misma
+    transacción de SQLite, cada una dentro de su SAVEPOINT: si una falla solo se
+    deshace esa y su caller recibe la excepción. Al final hay un único commit
+    (group commit) y recién ahí se entregan los resultados.
+    """
+    def __init__(self, max_batch: int = WRITER_MAX_BATCH):
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        self._ensure_started()
+        fut = Future()
+        self._queue.put((fut, fn, args, kwargs))
+        return fut
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        done = []
+        try:
+            with SessionLocal() as db:
+                for fut, fn, args, kwargs in batch:
+                    if not fut.set_running_or_notify_cancel():
+                        continue
+                    sp = db.begin_nested()
+                    try:
+                        res = fn(db, *args, **kwargs)
+                        sp.commit()
+                        done.append((fut, res, None))
+                    except Exception as e:
+                        # se anota antes del rollback: si el rollback falla, el
+                        # handler de afuera igual le entrega el error a este job
+                        done.append((fut, None, e))
+                        sp.rollback()
+                db.commit()
+        except Exception as e:
+            # falló la sesión o el commit del grupo: nada de lo ejecutado quedó
+            # guardado. Los jobs que no llegaron a correr también reciben el error,
+            # si no su run_write quedaría esperando para siempre.
+            for fut, res, err in done:
+                fut.set_exception(err or e)
+            for fut, *_ in batch:
+                if fut.done():
+                    continue
+                if fut.running() or fut.set_running_or_notify_cancel():
+                    fut.set_exception(e)
+            return
+
+        for fut, res, err in done:
+            if err is not None:
+                fut.set_exception(err)
+            else:
+                fut.set_result(res)
+
+writer = DbWriter()
+
+def _is_transient(e: BaseException) -> bool:
+    if isinstance(e, StaleDataError):
+        # otro proceso cambió la fila (version distinta): se relee y se reintenta
+        return True
+    if isinstance(e, OperationalError):
+        msg = str(e.orig).lower()
+        return "locked" in msg or "busy" in msg
+    return False
+
+async def run_write(fn, *args, **kwargs):
+    """
+    Encola fn(db, *args, **kwargs) en el escritor único y espera su resultado.
+    fn NO debe hacer commit: el writer lo hace para todo el grupo.
+    Ante errores transitorios se reintenta hasta WRITE_RETRIES veces, así que fn
+    tiene que poder correrse de nuevo desde cero (solo trabajo contra la DB).
+    """
+    for attempt in range(WRITE_RETRIES + 1):
+        try:
+            return await asyncio.wrap_future(writer.submit(fn, *args, **kwargs))
+        except Exception as e:
+            if attempt >= WRITE_RETRIES or not _is_transient(e):
+                raise
+            await asyncio.sleep(0.05 * (attempt + 1))
\ No newline at end of file
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from typing import Mapping
+
+@dataclass(frozen=True, slots=True)
+class EvalContext:
+    """
+    Hechos de un jugador para evaluar logros. backfill_progress los carga con una sola
+    consulta por hecho para todos los jugadores, así que la cantidad de queries no
+    depende ni de la cantidad de logros ni de la de jugadores.
+    """
+    player_id: str
+    pulls_by_key: Mapping[str, int]
+    equipment_count: int
@@ -1,11 +1,13 @@
-from typing import Callable, Optional, Tuple, Dict
+from typing import Callable, Dict, List, Tuple
 from .catalog import Achievement
-from .repository import pulls_count_by_banner, has_any_equipment
-from .banner_map import BANNER_KEY
+from .context import EvalContext
 
-# firma de evaluador
-Evaluator = Callable[[any, str, Achievement], Tuple[bool, Optional[str]]]
+# Progreso absoluto a partir de los hechos del jugador (backfill / recálculo completo)
+Evaluator = Callable[[EvalContext, Achievement], int]
+# Progreso nuevo ante un evento de dominio: handler(logro, progreso_actual, **payload) -> progreso
+Handler = Callable[..., int]
 _REGISTRY: Dict[str, Evaluator] = {}
+_HANDLERS: Dict[str, List[Tuple[str, Handler]]] = {}  # evento -> [(tipo de logro, handler)]
 
 def evaluator(kind: str):
     def deco(fn: Evaluator):
@@ -13,33 +15,45 @@ def evaluator(kind: str):
         return fn
     return deco
 
+def on(event: str, kind: str):
+    """Suscribe los logros de tipo `kind` al evento `event` (ver progress.track)."""
+    def deco(fn: Handler):
+        _HANDLERS.setdefault(event, []).append((kind, fn))
+        return fn
+    return deco
+
+def need(a: Achievement) -> int:
+    return int(a.params.get("count", a.params.get("level", 1)))
+
 @evaluator("pulls_by_key")
-def _pulls_by_key(db, player_id: str, a: Achievement):
-    key = a.params.get("key")
-    need = int(a.params.get("count", 0))
-    total = 0
-    for bid, cnt in pulls_count_by_banner(db, player_id):
-        if BANNER_KEY.get(bid) == key:
-            total += int(cnt)
-    return (total >= need, f"{total}/{need}")
+def _pulls_by_key(ctx: EvalContext, a: Achievement):
+    return ctx.pulls_by_key.get(a.params.get("key"), 0)
+
+@on("pulls", "pulls_by_key")
+def _pulls_by_key_on_pulls(a: Achievement, progress: int, key: str, count: int):
+    return progress + count if key == a.params.get("key") else progress
 
 @evaluator("has_any_equipment")
-def _has_any_equipment(db, player_id: str, a: Achievement):
-    has = has_any_equipment(db, player_id)
-    return (has > 0, f"{has}/1")
+def _has_any_equipment(ctx: EvalContext, a: Achievement):
+    return min(ctx.equipment_count, 1)
+
+@on("equip", "has_any_equipment")
+def _has_any_equipment_on_equip(a: Achievement, progress: int):
+    return max(progress, 1)
 
-@evaluator("character_level_reached")
-def _character_level_reached(db, player_id: str, a: Achievement):
-    lvl = int(a.params.get("level", 1))
-    return (False, f"0/{lvl}")  # placeholder
+# character_level_reached y battle_wins no tienen evaluador (todavía no hay niveles ni
+# batallas guardados): su progreso sale solo de eventos y no se puede recalcular.
 
-@evaluator("battle_wins")
-def _battle_wins(db, player_id: str, a: Achievement):
-    need = int(a.params.get("count", 1))
-    return (False, f"0/{need}")  # placeholder
+@on("battle_win", "battle_wins")
+def _battle_wins_on_win(a: Achievement, progress: int):
+    return progress + 1
 
-def is_completed(db, player_id: str, a: Achievement):
+def can_recompute(a: Achievement) -> bool:
+    return a.type in _REGISTRY
+
+def progress_of(ctx: EvalContext, a: Achievement) -> int:
     fn = _REGISTRY.get(a.type)
-    if not fn:
-        return (False, None)
-    return fn(db, player_id, a)
\ No newline at end of file
+    return fn(ctx, a) if fn else 0
+
+def handlers(event: str) -> List[Tuple[str, Handler]]:
+    return _HANDLERS.get(event, [])
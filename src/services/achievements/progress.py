@@ -0,0 +1,221 @@
+import hashlib, json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Mapping, Tuple
+from sqlalchemy import and_, func, select, update
+from ...db.models import AchievementDefinition, AchievementState, Equipment, PlayerBannerStats
+from ...db.upsert import upsert
+from .catalog import AchCatalog, Achievement, load_catalog
+from .context import EvalContext
+from .evaluators import can_recompute, handlers, need, progress_of
+
+# Progreso de logros guardado en achievement_state y actualizado por eventos de dominio
+# ("pulls", "equip", "battle_win") dentro de la misma transacción que los produce.
+
+EVENTS = ("pulls", "equip", "battle_win")
+
+@dataclass(frozen=True, slots=True)
+class _Index:
+    """Catálogo de logros compilado; se reemplaza entero al recargar (reload_achievements)."""
+    catalog: AchCatalog
+    by_id: Mapping[str, Achievement]
+    # evento -> [(logro, handler)] de los logros del catálogo suscriptos a ese evento
+    subscriptions: Mapping[str, Tuple[Tuple[Achievement, object], ...]]
+
+def _compile(catalog: AchCatalog) -> _Index:
+    subs: Dict[str, list] = {}
+    for a in catalog.achievements:
+        for event in EVENTS:
+            for kind, fn in handlers(event):
+                if kind == a.type:
+                    subs.setdefault(event, []).append((a, fn))
+    return _Index(
+        catalog=catalog,
+        by_id={a.id: a for a in catalog.achievements},
+        subscriptions={e: tuple(v) for e, v in subs.items()},
+    )
+
+_index = _compile(load_catalog())
+
+def achievements() -> List[Achievement]:
+    """Logros del catálogo vigente."""
+    return _index.catalog.achievements
+
+def reload_achievements() -> _Index:
+    """
+    Relee y compila achievements.json sin publicarlo (ver publish_achievements).
+    Si el archivo es inválido lanza la excepción y el vigente queda intacto.
+    """
+    return _compile(load_catalog())
+
+def publish_achievements(index: _Index):
+    """
+    Reemplaza el catálogo de logros vigente de una sola vez. Después hay que correr
+    backfill_if_needed para los logros nuevos o cambiados.
+    """
+    global _index
+    _index = index
+
+def _def_hash(a: Achievement) -> str:
+    raw = json.dumps({"type": a.type, "params": a.params}, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+def load_states(db, player_id: str) -> Dict[str, Tuple[int, datetime | None, datetime | None]]:
+    """achievement_id -> (progress, completed_at, claimed_at) de un jugador, en una sola lectura indexada."""
+    rows = db.execute(
+        select(AchievementState.achievement_id, AchievementState.progress,
+               AchievementState.completed_at, AchievementState.claimed_at)
+        .where(AchievementState.player_id == player_id)
+    ).all()
+    return {aid: (progress or 0, completed, claimed) for aid, progress, completed, claimed in rows}
+
+def _upsert_states(db, values: list[dict]):
+    st = AchievementState.__table__
+    db.execute(
+        upsert(
+            st, [st.c.player_id, st.c.achievement_id],
+            lambda excluded: {
+                "progress": excluded.progress,
+                "completed_at": func.coalesce(st.c.completed_at, excluded.completed_at),
+            },
+        ),
+        values,
+    )
+
+def track(db, player_id: str, event: str, **payload) -> List[Achievement]:
+    """
+    Aplica un evento al progreso de los logros suscriptos y devuelve los que se
+    completaron con este evento (para avisar en el momento, sin más consultas).
+    """
+    subs = _index.subscriptions.get(event)
+    if not subs:
+        return []
+
+    states = load_states(db, player_id)
+    now = datetime.now(timezone.utc)
+    values, completed = [], []
+    for a, fn in subs:
+        progress, done_at, claimed_at = states.get(a.id, (0, None, None))
+        if claimed_at is not None:
+            continue
+        new = fn(a, progress, **payload)
+        if new == progress:
+            continue
+        if done_at is None and new >= need(a):
+            done_at = now
+            completed.append(a)
+        values.append({"player_id": player_id, "achievement_id": a.id,
+                       "progress": new, "completed_at": done_at})
+    if values:
+        _upsert_states(db, values)
+    return completed
+
+def claim_ready(db, player_id: str, now: datetime) -> List[Achievement]:
+    """
+    Marca como reclamados todos los logros completos y sin reclamar con un UPDATE
+    condicional; solo lo devuelve quien efectivamente los reclamó (doble click = lista vacía).
+    """
+    by_id = _index.by_id
+    ids = db.execute(
+        update(AchievementState)
+        .where(
+            AchievementState.player_id == player_id,
+            AchievementState.achievement_id.in_(by_id),
+            AchievementState.claimed_at.is_(None),
+            AchievementState.completed_at.is_not(None),
+        )
+        .values(claimed_at=now)
+        .returning(AchievementState.achievement_id)
+    ).scalars().all()
+    return [by_id[aid] for aid in ids]
+
+def backfill_progress(db, targets: List[Achievement]) -> int:
+    """
+    Recalcula el progreso de `targets` para todos los jugadores desde los contadores
+    (player_banner_stats, equipment) con una consulta por hecho. Las filas sin reclamar
+    vuelven a 0 antes, por si la definición cambió; las reclamadas no se tocan.
+    completed_at lo ajusta después _settle_completion. Devuelve cuántas filas escribió.
+    """
+    ids = [a.id for a in targets]
+    db.execute(
+        update(AchievementState)
+        .where(AchievementState.achievement_id.in_(ids),
+               AchievementState.claimed_at.is_(None))
+        .values(progress=0)
+    )
+    claimed = {(pid, aid) for pid, aid in db.execute(
+        select(AchievementState.player_id, AchievementState.achievement_id)
+        .where(AchievementState.achievement_id.in_(ids),
+               AchievementState.claimed_at.is_not(None))
+    )}
+    pulls: Dict[str, Dict[str, int]] = {}
+    for pid, key, n in db.execute(
+        select(PlayerBannerStats.player_id, PlayerBannerStats.banner_key, PlayerBannerStats.pulls)
+    ):
+        pulls.setdefault(pid, {})[key] = n
+    equipment = dict(db.execute(
+        select(Equipment.player_id, func.count()).group_by(Equipment.player_id)
+    ).all())
+
+    now = datetime.now(timezone.utc)
+    values = []
+    for pid in pulls.keys() | equipment.keys():
+        ctx = EvalContext(pid, pulls_by_key=pulls.get(pid, {}),
+                          equipment_count=equipment.get(pid, 0))
+        for a in targets:
+            if (pid, a.id) in claimed:
+                continue
+            progress = progress_of(ctx, a)
+            if progress:
+                values.append({"player_id": pid, "achievement_id": a.id, "progress": progress,
+                               "completed_at": now if progress >= need(a) else None})
+    if values:
+        _upsert_states(db, values)
+    return len(values)
+
+def _settle_completion(db, stale: List[Achievement], now: datetime):
+    """
+    Ajusta completed_at de las filas sin reclamar a la definición nueva: se borra si el
+    progreso ya no alcanza y se marca ahora si recién alcanza. Las reclamadas quedan como
+    estaban (la recompensa ya se entregó).
+    """
+    for a in stale:
+        unclaimed = and_(AchievementState.achievement_id == a.id,
+                         AchievementState.claimed_at.is_(None))
+        db.execute(
+            update(AchievementState)
+            .where(unclaimed, AchievementState.completed_at.is_not(None),
+                   AchievementState.progress < need(a))
+            .values(completed_at=None)
+        )
+        db.execute(
+            update(AchievementState)
+            .where(unclaimed, AchievementState.completed_at.is_(None),
+                   AchievementState.progress >= need(a))
+            .values(completed_at=now)
+        )
+
+def backfill_if_needed(db) -> int | None:
+    """
+    Recalcula los logros nuevos o cuya definición (tipo + params) cambió desde el último
+    cálculo, según el hash guardado en achievement_definitions. Los que solo avanzan por
+    eventos (sin evaluador) conservan su progreso y arrancan de 0 si son nuevos. En todos,
+    completed_at de lo no reclamado se ajusta a la definición nueva. None si no había
+    nada que recalcular.
+    """
+    stored = dict(db.execute(
+        select(AchievementDefinition.achievement_id, AchievementDefinition.def_hash)
+    ).all())
+    stale = [a for a in achievements() if stored.get(a.id) != _def_hash(a)]
+    if not stale:
+        return None
+
+    targets = [a for a in stale if can_recompute(a)]
+    n = backfill_progress(db, targets) if targets else 0
+    _settle_completion(db, stale, datetime.now(timezone.utc))
+    defs = AchievementDefinition.__table__
+    db.execute(
+        upsert(defs, [defs.c.achievement_id], lambda excluded: {"def_hash": excluded.def_hash}),
+        [{"achievement_id": a.id, "def_hash": _def_hash(a)} for a in stale],
+    )
+    return n
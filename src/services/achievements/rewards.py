@@ -1,23 +1,33 @@
-from typing import Dict
+from typing import Dict, Iterable
+from sqlalchemy import update
+from ...db.models import Currency
 
-def apply_rewards(db, player, rewards: Dict[str, int]) -> str:
-    parts = []
-    if not player.currencies:
-        raise RuntimeError("El jugador no tiene fila de Currency creada.")
-
-    ts = int(rewards.get("tickets_standard", 0))
-    if ts:
-        player.currencies.tickets_standard += ts
-        parts.append(f"+{ts} Standard Pass")
+_FIELDS = (
+    ("tickets_standard", "Standard Pass"),
+    ("tickets_special", "Special Pass"),
+    ("credits", "créditos"),
+)
 
-    sp = int(rewards.get("tickets_special", 0))
-    if sp:
-        player.currencies.tickets_special += sp
-        parts.append(f"+{sp} Special Pass")
+def describe_rewards(rewards: Dict[str, int]) -> str:
+    parts = [f"+{int(rewards.get(k, 0))} {label}" for k, label in _FIELDS if int(rewards.get(k, 0))]
+    return ", ".join(parts) if parts else "Sin recompensa definida"
 
-    cr = int(rewards.get("credits", 0))
-    if cr:
-        player.currencies.credits += cr
-        parts.append(f"+{cr} créditos")
+def grant_rewards(db, player_id: str, rewards: Iterable[Dict[str, int]]):
+    """Suma todas las recompensas y las acredita con un solo UPDATE de currencies."""
+    totals = {k: 0 for k, _ in _FIELDS}
+    for r in rewards:
+        for k in totals:
+            totals[k] += int(r.get(k, 0))
+    if not any(totals.values()):
+        return
 
-    return ", ".join(parts) if parts else "Sin recompensa definida"
\ No newline at end of file
+    updated = db.execute(
+        update(Currency)
+        .where(Currency.player_id == player_id)
+        .values({
+            **{getattr(Currency, k): getattr(Currency, k) + v for k, v in totals.items() if v},
+            Currency.version: Currency.version + 1,
+        })
+    ).rowcount
+    if not updated:
+        raise RuntimeError("El jugador no tiene fila de Currency creada.")
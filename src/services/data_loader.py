@@ -1,36 +1,33 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel
+from dataclasses import dataclass
 from pathlib import Path
-import json
+from types import MappingProxyType
+from typing import Mapping
+import hashlib, json, os, pickle
 
 BASE = Path(__file__).resolve().parents[2]
 
+DATA_FILES = [
+    BASE / "data/characters/characters.json",
+    BASE / "data/light-cones/light-cones.json",
+    BASE / "data/banners/banners.json",
+    BASE / "data/achievements/achievements.json",
+]
+SNAPSHOT_PATH = Path(os.getenv("CATALOG_SNAPSHOT", BASE / "data/.catalog.snapshot"))
+# Subir si cambian los modelos o los índices derivados: invalida snapshots viejos
+SNAPSHOT_FORMAT = 2
+
 class Character(BaseModel):
     id: str; name: str; rarity: int
     path: str; element: str; image: str
     tags: list[str] = []
 
-    @field_validator("image")
-    @classmethod
-    def image_exists(cls, v: str):
-        p = BASE / v
-        if not p.exists():
-            raise ValueError(f"Imagen no encontrada: {p}")
-        return v
-
 class LightCone(BaseModel):
     id: str; name: str; rarity: int
     path: str; image: str
     hp: int; atk: int; def_: int
     favorites: list[str] = [] 
 
-    @field_validator("image")
-    @classmethod
-    def image_exists(cls, v: str):
-        p = BASE / v
-        if not p.exists():
-            raise ValueError(f"Imagen no encontrada: {p}")
-        return v
-
     @classmethod
     def model_validate_json(cls, d: dict):
         d = dict(d)
@@ -109,3 +106,188 @@ def load_data():
                 raise ValueError(f"IDs inexistentes en {b.id}/{lst_name}: {missing}")
 
     return characters, light_cones, banners
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """
+    Catálogo inmutable compartido por todo el proceso.
+    Se construye una sola vez (ver get_catalog) y se inyecta en los cogs.
+    """
+    characters: CharactersFile
+    light_cones: LightConesFile
+    banners: BannersFile
+    char_map: Mapping[str, Character]                               # id -> Character
+    lc_map: Mapping[str, LightCone]                                 # id -> LightCone
+    banner_map: Mapping[str, Banner]                                # id -> Banner
+    char_meta: Mapping[str, tuple[str, int, str]]                   # id -> (name, rarity, path)
+    lc_meta: Mapping[str, tuple[str, int, str, frozenset[str]]]     # id -> (name, rarity, path, favorites)
+    banner_key: Mapping[str, str]                                   # banner id -> key
+    chars_by_path: Mapping[str, tuple[str, ...]]                    # path -> ids de personajes (rareza desc, nombre)
+    lcs_by_path: Mapping[str, tuple[str, ...]]                      # path -> ids de LCs (rareza desc, nombre)
+    lc_favorites: Mapping[str, tuple[str, ...]]                     # personaje -> LCs favoritos de su path (mismo orden)
+
+def data_hash() -> str:
+    """Hash del contenido de los JSON del catálogo (clave del snapshot)."""
+    h = hashlib.sha256(f"format:{SNAPSHOT_FORMAT}".encode())
+    for path in DATA_FILES:
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+def _by_path(items) -> dict[str, tuple[str, ...]]:
+    """path -> ids ordenados por (rareza desc, nombre); los paths quedan en orden alfabético."""
+    groups: dict[str, list] = {}
+    for it in sorted(items, key=lambda it: (-it.rarity, it.name)):
+        groups.setdefault(it.path, []).append(it.id)
+    return {path: tuple(groups[path]) for path in sorted(groups)}
+
+def _compile_catalog() -> dict:
+    characters, light_cones, banners = load_data()
+    chars = characters.characters
+    lcs = light_cones.light_cones
+    lcs_by_path = _by_path(lcs)
+    lc_map = {l.id: l for l in lcs}
+    lc_favorites = {}
+    for c in chars:
+        favs = tuple(lid for lid in lcs_by_path.get(c.path, ()) if c.id in lc_map[lid].favorites)
+        if favs:
+            lc_favorites[c.id] = favs
+    return {
+        "characters": characters,
+        "light_cones": light_cones,
+        "banners": banners,
+        "char_map": {c.id: c for c in chars},
+        "lc_map": lc_map,
+        "banner_map": {b.id: b for b in banners.banners},
+        "char_meta": {c.id: (c.name, c.rarity, c.path) for c in chars},
+        "lc_meta": {l.id: (l.name, l.rarity, l.path, frozenset(l.favorites)) for l in lcs},
+        "banner_key": {b.id: b.key for b in banners.banners},
+        "chars_by_path": _by_path(chars),
+        "lcs_by_path": lcs_by_path,
+        "lc_favorites": lc_favorites,
+    }
+
+def _read_snapshot(key: str) -> dict | None:
+    try:
+        with SNAPSHOT_PATH.open("rb") as f:
+            snap = pickle.load(f)
+    except Exception:
+        # no existe, está corrupto o es de otra versión: se recompila
+        return None
+    if not isinstance(snap, dict) or snap.get("key") != key:
+        return None
+    return snap["data"]
+
+def _write_snapshot(key: str, data: dict):
+    tmp = SNAPSHOT_PATH.with_suffix(".tmp")
+    try:
+        with tmp.open("wb") as f:
+            pickle.dump({"key": key, "data": data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, SNAPSHOT_PATH)
+    except Exception as e:
+        # el snapshot es solo una optimización, sin él igual arrancamos (pickle
+        # puede fallar con TypeError/AttributeError además de PicklingError)
+        tmp.unlink(missing_ok=True)
+        print(f"No se pudo guardar el snapshot del catálogo: {e}")
+
+def build_catalog(use_snapshot: bool = True) -> Catalog:
+    """
+    Arma el catálogo. Si hay un snapshot compilado cuyo hash coincide con los
+    JSON actuales se carga directo (sin validar con pydantic); si no, se
+    valida todo con load_data() y se guarda el snapshot para el próximo arranque.
+    """
+    data = None
+    if use_snapshot:
+        key = data_hash()
+        data = _read_snapshot(key)
+    if data is None:
+        data = _compile_catalog()
+        if use_snapshot:
+            _write_snapshot(key, data)
+
+    return Catalog(
+        characters=data["characters"],
+        light_cones=data["light_cones"],
+        banners=data["banners"],
+        char_map=MappingProxyType(data["char_map"]),
+        lc_map=MappingProxyType(data["lc_map"]),
+        banner_map=MappingProxyType(data["banner_map"]),
+        char_meta=MappingProxyType(data["char_meta"]),
+        lc_meta=MappingProxyType(data["lc_meta"]),
+        banner_key=MappingProxyType(data["banner_key"]),
+        chars_by_path=MappingProxyType(data["chars_by_path"]),
+        lcs_by_path=MappingProxyType(data["lcs_by_path"]),
+        lc_favorites=MappingProxyType(data["lc_favorites"]),
+    )
+
+def verify_images(catalog: Catalog, strict: bool = False) -> list[str]:
+    """
+    Verifica que existan las imágenes de personajes y light cones.
+    Hace un solo listado por carpeta de imágenes y compara contra el catálogo
+    (en vez de un stat por item). Devuelve las rutas faltantes; con strict=True
+    lanza ValueError si falta alguna.
+    """
+    wanted: dict[Path, list[str]] = {}
+    items = list(catalog.characters.characters) + list(catalog.light_cones.light_cones)
+    for it in items:
+        p = BASE / it.image
+        wanted.setdefault(p.parent, []).append(it.image)
+
+    missing = []
+    for folder, images in wanted.items():
+        try:
+            present = set(os.listdir(folder))
+        except FileNotFoundError:
+            present = set()
+        missing.extend(img for img in images if Path(img).name not in present)
+
+    if strict and missing:
+        raise ValueError(f"Imágenes no encontradas: {missing}")
+    return missing
+
+_catalog: Catalog | None = None
+
+def get_catalog() -> Catalog:
+    """Devuelve el catálogo del proceso, construyéndolo la primera vez."""
+    global _catalog
+    if _catalog is None:
+        _catalog = build_catalog()
+    return _catalog
+
+
+def reload_catalog() -> tuple[Catalog, dict[str, list[str]]]:
+    """
+    Reconstruye el catálogo desde los JSON, sin publicarlo todavía: quien recarga
+    prepara lo que depende de él y después llama a publish_catalog.
+    Pensado para correr fuera del event loop (asyncio.to_thread). Si los datos
+    son inválidos lanza la excepción y el catálogo anterior queda intacto.
+    Devuelve (catálogo nuevo, diff contra el actual).
+    """
+    new = build_catalog()
+    return new, diff_catalogs(get_catalog(), new)
+
+def publish_catalog(catalog: Catalog):
+    """Reemplaza el catálogo del proceso (lo que devuelve get_catalog)."""
+    global _catalog
+    _catalog = catalog
+
+def diff_catalogs(old: Catalog, new: Catalog) -> dict[str, list[str]]:
+    """Diferencias entre dos catálogos por sección: '+id' agregado, '-id' quitado, '~id' modificado."""
+    report = {}
+    for section, a, b in (
+        ("characters", old.char_map, new.char_map),
+        ("light_cones", old.lc_map, new.lc_map),
+        ("banners", old.banner_map, new.banner_map),
+    ):
+        changes = [f"+{k}" for k in b if k not in a]
+        changes += [f"-{k}" for k in a if k not in b]
+        changes += [f"~{k}" for k in b if k in a and a[k] != b[k]]
+        if changes:
+            report[section] = changes
+    return report
+
+if __name__ == "__main__":
+    # Modo estricto para CI: python -m src.services.data_loader
+    verify_images(build_catalog(use_snapshot=False), strict=True)
+    print("Catálogo OK")
@@ -1,5 +1,15 @@
-from sqlalchemy import select, func
+from dataclasses import dataclass
+from typing import Mapping
+from sqlalchemy import select
 from ..db.models import Player, InventoryItem, Equipment
+from .achievements.progress import track
+
+@dataclass(frozen=True, slots=True)
+class Ownership:
+    """Lo que posee y tiene equipado un jugador, leído una vez para armar los selectores."""
+    chars: frozenset[str]           # ids de personajes con al menos una copia
+    lcs: Mapping[str, int]          # light_cone_id -> copias
+    equipped: Mapping[str, str]     # character_id -> light_cone_id
 
 class EquipmentService:
     """Lógica de negocio para equipamiento 1:1 Personaje ↔ Light Cone."""
@@ -8,18 +18,18 @@ class EquipmentService:
     @staticmethod
     def owns_char(db, player_id: str, cid: str) -> bool:
         row = db.execute(
-            select(func.sum(InventoryItem.copies)).where(
+            select(InventoryItem.copies).where(
                 InventoryItem.player_id == player_id,
                 InventoryItem.item_type == "character",
                 InventoryItem.item_id == cid,
             )
         ).scalar()
-        return bool(row and int(row) >= 1)
+        return int(row or 0) >= 1
 
     @staticmethod
     def owns_lc(db, player_id: str, lid: str) -> bool:
         row = db.execute(
-            select(func.sum(InventoryItem.copies)).where(
+            select(InventoryItem.copies).where(
                 InventoryItem.player_id == player_id,
                 InventoryItem.item_type == "light_cone",
                 InventoryItem.item_id == lid,
@@ -45,6 +55,40 @@ class EquipmentService:
             )
         ).scalars().first()
 
+    # ---- consultas en bloque (una por tipo, no una por item del catálogo) ----
+    @staticmethod
+    def owned_char_ids(db, player_id: str) -> set[str]:
+        return set(db.execute(
+            select(InventoryItem.item_id).where(
+                InventoryItem.player_id == player_id,
+                InventoryItem.item_type == "character",
+                InventoryItem.copies >= 1,
+            )
+        ).scalars())
+
+    @staticmethod
+    def owned_lc_copies(db, player_id: str) -> dict[str, int]:
+        return dict(db.execute(
+            select(InventoryItem.item_id, InventoryItem.copies).where(
+                InventoryItem.player_id == player_id,
+                InventoryItem.item_type == "light_cone",
+                InventoryItem.copies >= 1,
+            )
+        ).all())
+
+    @staticmethod
+    def equip_map(db, player_id: str) -> dict[str, str]:
+        """character_id -> light_cone_id del jugador."""
+        return dict(EquipmentService.list_pairs(db, player_id))
+
+    @staticmethod
+    def ownership(db, player_id: str) -> Ownership:
+        return Ownership(
+            chars=frozenset(EquipmentService.owned_char_ids(db, player_id)),
+            lcs=EquipmentService.owned_lc_copies(db, player_id),
+            equipped=EquipmentService.equip_map(db, player_id),
+        )
+
     # ---- acciones ----
     @staticmethod
     def equip(db, player_id: str, character_id: str, light_cone_id: str):
@@ -71,6 +115,7 @@ class EquipmentService:
                     character_id=character_id,
                     light_cone_id=light_cone_id
                 ))
+        track(db, player_id, "equip")
 
     @staticmethod
     def unequip(db, player_id: str, character_id: str) -> bool:
@@ -1,5 +1,9 @@
 from datetime import datetime, timezone
-from ..db.models import Player, GachaState, InventoryItem, PullHistory
+from sqlalchemy import select, tuple_, update
+from ..db.models import Currency, GachaState, InventoryItem, PullHistory
+from ..db.upsert import upsert
+from .player_stats import record_pulls
+from .achievements.progress import track
 from ..util.gacha.gacha_helpers import eidolons_from_copies, superpos_from_copies
 
 def run_pull_transaction(db, GS, player_id: str, count: int):
@@ -8,98 +12,131 @@ def run_pull_transaction(db, GS, player_id: str, count: int):
     Devuelve: (results, banner_obj, final_state_dict)
       - results: list[(rarity:int, item_obj, item_type:str, note:str)]
       - banner_obj: banner actual
-      - final_state_dict: {'pity4':int, 'pity5':int, 'last_feat':bool}
+      - final_state_dict: {'pity4':int, 'pity5':int, 'last_feat':bool, 'total_pulls':int,
+                           'achievements': list[str] (logros completados con esta tirada)}
     Lanza excepciones si faltan cosas (no registrado, sin tickets, banner inactivo, etc.).
     """
-    p = db.get(Player, player_id)
-    if not p:
+    # GachaState se crea junto con el Player en /register
+    gs = db.get(GachaState, player_id)
+    if not gs:
         raise RuntimeError("Usá /register primero.")
-
-    gs = db.get(GachaState, p.user_id)
     b = GS.banners[gs.banner_id]
 
     # Validez banner
     if not GS.is_banner_active(gs.banner_id):
         raise RuntimeError(f"El banner {b.name} está inactivo. Elegí otro con /set_banner.")
 
-    # Tickets según tipo
+    # Tickets según tipo: débito atómico, solo si alcanzan (un único UPDATE ... RETURNING)
     if b.key == "star_rail_pass":
-        have = p.currencies.tickets_standard
-        if have < count:
-            raise RuntimeError(f"No te alcanzan los tickets. Tenés {have} Star Rail Pass.")
-        p.currencies.tickets_standard -= count
+        col, pass_name = Currency.tickets_standard, "Star Rail Pass"
     else:
-        have = p.currencies.tickets_special
-        if have < count:
-            raise RuntimeError(f"No te alcanzan los tickets. Tenés {have} Star Rail Special Pass.")
-        p.currencies.tickets_special -= count
+        col, pass_name = Currency.tickets_special, "Star Rail Special Pass"
+    left = db.execute(
+        update(Currency)
+        .where(Currency.player_id == player_id, col >= count)
+        .values({col: col - count, Currency.version: Currency.version + 1})
+        .returning(col)
+    ).scalar()
+    if left is None:
+        have = db.execute(select(col).where(Currency.player_id == player_id)).scalar() or 0
+        raise RuntimeError(f"No te alcanzan los tickets. Tenés {have} {pass_name}.")
 
-    pity4, pity5 = gs.pity4, gs.pity5
-    last_feat = gs.last_5_was_featured
+    draws, pity4, pity5, last_feat = GS.draw_batch(
+        gs.banner_id, count, gs.pity4, gs.pity5, gs.last_5_was_featured
+    )
 
-    results = []
-    for _ in range(count):
-        rarity = GS.roll_rarity(pity4, pity5, b.rates)
-        item_id, item_type, is_feat = GS.choose_item(gs.banner_id, rarity, last_feat)
-        item = GS.characters[item_id] if item_type == "character" else GS.light_cones[item_id]
+    # Copias actuales de los items tirados en una sola consulta; el batch se resuelve
+    # en memoria y se escribe con un único upsert (índice único player/tipo/item).
+    keys = {(item_type, item_id) for _, item_id, item_type, _ in draws}
+    copies = dict(((t, i), c) for t, i, c in db.execute(
+        select(InventoryItem.item_type, InventoryItem.item_id, InventoryItem.copies)
+        .where(InventoryItem.player_id == player_id,
+               tuple_(InventoryItem.item_type, InventoryItem.item_id).in_(keys))
+    ))
+    gained = {}
 
-        inv = (db.query(InventoryItem)
-                 .filter(InventoryItem.player_id == p.user_id,
-                         InventoryItem.item_id == item_id,
-                         InventoryItem.item_type == item_type)
-                 .first())
+    refund_standard = refund_special = 0
+    results = []
+    for rarity, item_id, item_type, item in draws:
+        key = (item_type, item_id)
+        current = copies.get(key)
 
         note = ""
-        if inv is None:
-            inv = InventoryItem(player_id=p.user_id, item_id=item_id, item_type=item_type, copies=1)
-            db.add(inv)
+        if current is None:
+            copies[key] = gained[key] = 1
             note = "E0 (nuevo)" if item_type == "character" else "S1 (nuevo)"
         else:
             if item_type == "character":
-                current_e = eidolons_from_copies(inv.copies)
+                current_e = eidolons_from_copies(current)
                 if current_e >= 6:
                     if rarity == 5:
-                        p.currencies.tickets_special += 5
+                        refund_special += 5
                         note = "Convertido: +5 Special Pass (E6)"
                     elif rarity == 4:
-                        p.currencies.tickets_standard += 2
+                        refund_standard += 2
                         note = "Convertido: +2 Standard Pass (E6)"
                     else:
                         note = "Máximo de copias"
                 else:
-                    inv.copies += 1
-                    note = f"E{eidolons_from_copies(inv.copies)}"
+                    copies[key] = current + 1
+                    gained[key] = gained.get(key, 0) + 1
+                    note = f"E{eidolons_from_copies(current + 1)}"
             else:
-                current_s = superpos_from_copies(inv.copies)
+                current_s = superpos_from_copies(current)
                 if current_s >= 5:
                     if rarity == 5:
-                        p.currencies.tickets_special += 5
+                        refund_special += 5
                         note = "Convertido: +5 Special Pass (E6)"
                     elif rarity == 4:
-                        p.currencies.tickets_standard += 2
+                        refund_standard += 2
                         note = "Convertido: +2 Standard Pass (E6)"
                     else:
                         note = "Máximo de copias"
                 else:
-                    inv.copies += 1
-                    note = f"S{superpos_from_copies(inv.copies)}"
+                    copies[key] = current + 1
+                    gained[key] = gained.get(key, 0) + 1
+                    note = f"S{superpos_from_copies(current + 1)}"
 
-        # pity / featured
-        pity4 = 0 if rarity >= 4 else pity4 + 1
-        pity5 = 0 if rarity >= 5 else pity5 + 1
-        if rarity == 5:
-            last_feat = is_feat
+        results.append((rarity, item, item_type, note))
 
-        db.add(PullHistory(
-            player_id=p.user_id,
-            banner_id=gs.banner_id,
-            rarity=rarity,
-            item_id=item_id,
-            item_type=item_type,
-            ts=datetime.now(timezone.utc)
-        ))
+    if gained:
+        inv = InventoryItem.__table__
+        db.execute(
+            upsert(
+                inv, [inv.c.player_id, inv.c.item_type, inv.c.item_id],
+                lambda excluded: {"copies": inv.c.copies + excluded.copies},
+            ),
+            [
+                {"player_id": player_id, "item_type": item_type, "item_id": item_id, "copies": n}
+                for (item_type, item_id), n in gained.items()
+            ]
+        )
 
-        results.append((rarity, item, item_type, note))
+    # Historial: un solo INSERT executemany (Core, sin objetos ORM por tirada)
+    now = datetime.now(timezone.utc)
+    db.execute(
+        PullHistory.__table__.insert(),
+        [
+            {"player_id": player_id, "banner_id": gs.banner_id, "rarity": rarity,
+             "item_id": item_id, "item_type": item_type, "ts": now}
+            for rarity, item_id, item_type, _ in draws
+        ]
+    )
+    total_pulls = record_pulls(db, player_id, b.key, (d[0] for d in draws), now)
+    completed = track(db, player_id, "pulls", key=b.key, count=len(draws))
+
+    # Conversiones por E6/S5: un solo UPDATE con lo acumulado en el batch
+    if refund_standard or refund_special:
+        db.execute(
+            update(Currency)
+            .where(Currency.player_id == player_id)
+            .values({
+                Currency.tickets_standard: Currency.tickets_standard + refund_standard,
+                Currency.tickets_special: Currency.tickets_special + refund_special,
+                Currency.version: Currency.version + 1,
+            })
+        )
 
     gs.pity4, gs.pity5, gs.last_5_was_featured = pity4, pity5, last_feat
-    return results, b, {"pity4": pity4, "pity5": pity5, "last_feat": last_feat}
\ No newline at end of file
+    return results, b, {"pity4": pity4, "pity5": pity5, "last_feat": last_feat,
+                        "total_pulls": total_pulls, "achievements": [a.name for a in completed]}
\ No newline at end of file
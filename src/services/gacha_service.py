@@ -1,120 +1,142 @@
 import random
-from typing import Tuple, Literal
+from dataclasses import dataclass
+from typing import Tuple, Literal, Any
+from .pity_table import PityTable, compile_pity_table
 
 ItemType = Literal["character", "light_cone"]
+# (item_id, item_type, objeto Character/LightCone ya resuelto)
+DrawEntry = Tuple[str, ItemType, Any]
+
+STANDARD_BANNER_ID = "stellar_warp"
+
+@dataclass(frozen=True, slots=True)
+class DrawTable:
+    """
+    Pools de un banner ya resueltos, compilados una vez al cargar.
+    Una tirada es solo elegir un índice de alguna de estas tuplas.
+    """
+    standard: bool                       # banner de Star Rail Pass
+    five: tuple[DrawEntry, ...]          # estándar: personajes + LCs 5★
+    five_featured: tuple[DrawEntry, ...] # especial: 5★ featured del banner
+    five_lose: tuple[DrawEntry, ...]     # especial: 5★ al perder el 50/50 (o fallback)
+    four: tuple[DrawEntry, ...]
+    three: tuple[DrawEntry, ...]
 
 class GachaService:
     def __init__(self, characters, light_cones, banners):
         self.characters = {c.id: c for c in characters.characters}
         self.light_cones = {l.id: l for l in light_cones.light_cones}
         self.banners = {b.id: b for b in banners.banners}
+        self.tables = {bid: self._compile_table(b) for bid, b in self.banners.items()}
+        self.pity_tables: dict[str, PityTable] = {
+            bid: compile_pity_table(b.rates, bid) for bid, b in self.banners.items()
+        }
 
-    def is_banner_active(self, banner_id: str) -> bool:
-        b = self.banners.get(banner_id)
-        if not b:
-            return False
-        return getattr(b, "active", True)
+    def _chars(self, ids) -> tuple[DrawEntry, ...]:
+        return tuple((cid, "character", self.characters[cid]) for cid in ids)
 
-    def roll_rarity(self, pity4: int, pity5: int, rates) -> int:
-        if pity5 + 1 >= rates.hard_pity["five_at"]:
-            return 5
-        if pity4 + 1 >= rates.hard_pity["four_at"]:
-            base5 = rates.base["5"]
-            r = random.random()
-            return 5 if r < base5 else 4
-
-        base5 = rates.base["5"]; base4 = rates.base["4"]
-        if rates.soft_pity and pity5 + 1 >= rates.soft_pity["start_5"]:
-            inc = rates.soft_pity["inc_5"] * (pity5 + 1 - rates.soft_pity["start_5"])
-            base5 = min(1.0, base5 + inc)
-        if rates.soft_pity and pity4 + 1 >= rates.soft_pity["start_4"]:
-            inc4 = rates.soft_pity["inc_4"] * (pity4 + 1 - rates.soft_pity["start_4"])
-            base4 = min(1.0 - base5, base4 + inc4)
-
-        r = random.random()
-        if r < base5: return 5
-        if r < base5 + base4: return 4
-        return 3
-
-    def choose_item(self, banner_id: str, rarity: int, last_5_was_featured: bool) -> Tuple[str, ItemType, bool]:
-        """
-        Devuelve (item_id, item_type, is_featured).
+    def _lcs(self, ids) -> tuple[DrawEntry, ...]:
+        return tuple((lid, "light_cone", self.light_cones[lid]) for lid in ids)
 
+    def _compile_table(self, b) -> DrawTable:
+        """
         Reglas:
         - En banners de SPECIAL PASS (limitados de personaje):
           * Para 5★: 50% personaje featured del banner, 50% personaje 5★ del pool de 'stellar_warp'.
-          * Si perdiste el 50/50 en el último 5★ (last_5_was_featured = False), el próximo 5★ es garantizado featured.
           * SOLO personajes para 5★ (no LCs) en estos banners.
-        - En 'stellar_warp' (STANDARD PASS): se mantiene el comportamiento original (mezcla según pool).
-        - 4★ y 3★: igual que antes (según pools del banner actual).
+        - En 'stellar_warp' (STANDARD PASS): 5★ mezcla personajes y LCs según pool.
+        - 4★ y 3★: según pools del banner.
         """
-        b = self.banners[banner_id]
         pool = b.pool
-        is_featured = False
+        featured, lose = (), ()
+        if b.key != "star_rail_pass":
+            featured = self._chars(pool.five_star_c)
+            std_banner = self.banners.get(STANDARD_BANNER_ID)
+            lose = self._chars(std_banner.pool.five_star_c) if std_banner and std_banner.pool else ()
+            if not featured and not lose:
+                # nada definido (datos incompletos): cualquier 4★ como salvavidas
+                if pool.four_star_c:
+                    lose = self._chars(pool.four_star_c)
+                else:
+                    lose = self._lcs(pool.four_star_l)
+
+        return DrawTable(
+            standard=(b.key == "star_rail_pass"),
+            five=self._chars(pool.five_star_c) + self._lcs(pool.five_star_l),
+            five_featured=featured,
+            five_lose=lose,
+            four=self._chars(pool.four_star_c) + self._lcs(pool.four_star_l),
+            # Fallback por si no hay 3★: tirar un 4★ personaje del pool
+            three=self._lcs(pool.three_star_l) or self._chars(pool.four_star_c),
+        )
+
+    def is_banner_active(self, banner_id: str) -> bool:
+        b = self.banners.get(banner_id)
+        if not b:
+            return False
+        return getattr(b, "active", True)
+
+    def roll_rarity(self, banner_id: str, pity4: int, pity5: int) -> int:
+        return self.pity_tables[banner_id].rarity(random.random(), pity4, pity5)
+
+    def draw_batch(self, banner_id: str, count: int, pity4: int, pity5: int, last_5_was_featured: bool):
+        """
+        Tira `count` veces seguidas en un solo llamado, arrastrando pity y guarantee
+        de una tirada a la siguiente. Es una API de lote, no está vectorizada: cada
+        tirada depende del pity que dejó la anterior, así que el loop es por tirada
+        (lo que se ahorra es la resolución de tablas y métodos una sola vez por lote).
+        Consume `random` en el mismo orden que `count` llamados a roll_rarity +
+        choose_item (misma semilla, mismas tiradas).
+        Devuelve (draws, pity4, pity5, last_5_was_featured):
+          - draws: list[(rarity:int, item_id:str, item_type:str, item:obj)]
+        """
+        rarity_for = self.pity_tables[banner_id].rarity
+        choose_item = self.choose_item
+        rand = random.random
+
+        draws = []
+        for _ in range(count):
+            rarity = rarity_for(rand(), pity4, pity5)
+            item_id, item_type, item, is_feat = choose_item(banner_id, rarity, last_5_was_featured)
+            pity4 = 0 if rarity >= 4 else pity4 + 1
+            pity5 = 0 if rarity >= 5 else pity5 + 1
+            if rarity == 5:
+                last_5_was_featured = is_feat
+            draws.append((rarity, item_id, item_type, item))
+        return draws, pity4, pity5, last_5_was_featured
+
+    def choose_item(self, banner_id: str, rarity: int, last_5_was_featured: bool) -> Tuple[str, ItemType, Any, bool]:
+        """
+        Devuelve (item_id, item_type, item, is_featured) usando la tabla precompilada del banner.
+        Si perdiste el 50/50 en el último 5★ (last_5_was_featured = False), el próximo 5★
+        de un banner especial es garantizado featured.
+        """
+        t = self.tables[banner_id]
 
-        # --- 5 ESTRELLAS ---
         if rarity == 5:
-            # STANDARD banner: comportamiento original (puede mezclar personaje/LC según datos)
-            if b.key == "star_rail_pass":
-                chars = list(pool.five_star_c)
-                lcones = list(pool.five_star_l)
-                combined = [(cid, "character") for cid in chars] + [(lid, "light_cone") for lid in lcones]
-                if not combined and chars:
-                    combined = [(cid, "character") for cid in chars]
-                elif not combined and lcones:
-                    combined = [(lid, "light_cone") for lid in lcones]
-                item_id, itype = random.choice(combined)
-                # En estándar no afecta guarantee; marcamos featured=True para no “romper” tu flag
-                return item_id, itype, True
-
-            # SPECIAL banner (limitado de personaje): aplicar 50/50 contra 'stellar_warp'
-            # 1) featured del banner actual (personajes 5★ del pool del banner)
-            featured_chars = list(pool.five_star_c)
-
-            # 2) personajes 5★ del pool de stellar_warp (para "perder" el 50/50)
-            std_banner = self.banners.get("stellar_warp")
-            std_chars = list(std_banner.pool.five_star_c) if std_banner and std_banner.pool else []
-
-            # Si por configuración no hay featured o std, hacemos fallbacks razonables
-            if not featured_chars and std_chars:
-                # sin featured definidos -> cae del estándar
-                return random.choice(std_chars), "character", False
-            if featured_chars and not std_chars:
+            if t.standard:
+                if not t.five:
+                    raise RuntimeError("No hay pools configurados para 5★ en el banner.")
+                # En estándar no afecta guarantee; marcamos featured=True para no “romper” el flag
+                return (*random.choice(t.five), True)
+            if t.five_featured and t.five_lose:
+                # Guarantee, o 50/50 normal
+                if not last_5_was_featured or random.random() < 0.5:
+                    return (*random.choice(t.five_featured), True)
+                return (*random.choice(t.five_lose), False)
+            if t.five_featured:
                 # no hay estándar -> siempre featured
-                return random.choice(featured_chars), "character", True
-            if not featured_chars and not std_chars:
-                # nada definido (datos incompletos): devolvemos cualquier 4★ como salvavidas
-                fallback = pool.four_star_c or pool.four_star_l or []
-                pick = random.choice(list(fallback)) if fallback else None
-                if pick:
-                    return pick, ("character" if pick in pool.four_star_c else "light_cone"), False
-                # último fallback imposible
-                raise RuntimeError("No hay pools configurados para 5★ ni fallback en el banner.")
-
-            # Guarantee: si la anterior NO fue featured, este 5★ es garantizado featured
-            if not last_5_was_featured:
-                return random.choice(featured_chars), "character", True
-
-            # 50/50 normal: 50% featured, 50% estándar
-            if random.random() < 0.5:
-                return random.choice(featured_chars), "character", True
-            else:
-                return random.choice(std_chars), "character", False
-
-        # --- 4 ESTRELLAS ---
+                return (*random.choice(t.five_featured), True)
+            if t.five_lose:
+                # sin featured definidos -> cae del estándar (o del fallback 4★)
+                return (*random.choice(t.five_lose), False)
+            raise RuntimeError("No hay pools configurados para 5★ ni fallback en el banner.")
+
         if rarity == 4:
-            combined = [(cid, "character") for cid in pool.four_star_c] + \
-                       [(lid, "light_cone") for lid in pool.four_star_l]
-            if combined:
-                item_id, itype = random.choice(combined)
-            else:
-                # fallback mínimo
-                item_id, itype = (random.choice(pool.four_star_c), "character")
-            return item_id, itype, False
-
-        # --- 3 ESTRELLAS ---
-        if pool.three_star_l:
-            return random.choice(pool.three_star_l), "light_cone", False
-
-        # Fallback por si no hay 3★: tirar un 4★ del pool
-        return random.choice(pool.four_star_c), "character", False
\ No newline at end of file
+            if not t.four:
+                raise RuntimeError("No hay pools configurados para 4★ en el banner.")
+            return (*random.choice(t.four), False)
+
+        if not t.three:
+            raise RuntimeError("No hay pools configurados para 3★ en el banner.")
+        return (*random.choice(t.three), False)
\ No newline at end of file
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True, slots=True)
+class PityTable:
+    """
+    Umbrales acumulados de rareza de un banner, indexados por contador de pity.
+    Fila plana: idx = pity5 * four_at + pity4 (pity5 < five_at, pity4 < four_at).
+    Con r uniforme en [0, 1): r < five[idx] -> 5★, r < four[idx] -> 4★, si no 3★.
+    Sirve también para simuladores y analytics (probabilidad exacta de cada tirada).
+    """
+    five_at: int
+    four_at: int
+    five: tuple[float, ...]
+    four: tuple[float, ...]
+
+    def index(self, pity4: int, pity5: int) -> int:
+        # Un pity por encima del hard pity (p.ej. viniendo de otro banner) cae en la fila de hard pity
+        return min(pity5, self.five_at - 1) * self.four_at + min(pity4, self.four_at - 1)
+
+    def rarity(self, r: float, pity4: int, pity5: int) -> int:
+        i = self.index(pity4, pity5)
+        if r < self.five[i]: return 5
+        if r < self.four[i]: return 4
+        return 3
+
+    def probs(self, pity4: int, pity5: int) -> tuple[float, float, float]:
+        """(p5, p4, p3) de la próxima tirada."""
+        i = self.index(pity4, pity5)
+        return self.five[i], self.four[i] - self.five[i], 1.0 - self.four[i]
+
+def _thresholds(pity4: int, pity5: int, rates) -> tuple[float, float]:
+    if pity5 + 1 >= rates.hard_pity["five_at"]:
+        return 1.0, 1.0
+    if pity4 + 1 >= rates.hard_pity["four_at"]:
+        # hard pity de 4★: 5★ a tasa base, si no 4★
+        return rates.base["5"], 1.0
+
+    base5 = rates.base["5"]; base4 = rates.base["4"]
+    if rates.soft_pity and pity5 + 1 >= rates.soft_pity["start_5"]:
+        inc = rates.soft_pity["inc_5"] * (pity5 + 1 - rates.soft_pity["start_5"])
+        base5 = min(1.0, base5 + inc)
+    if rates.soft_pity and pity4 + 1 >= rates.soft_pity["start_4"]:
+        inc4 = rates.soft_pity["inc_4"] * (pity4 + 1 - rates.soft_pity["start_4"])
+        base4 = min(1.0 - base5, base4 + inc4)
+    return base5, base5 + base4
+
+def compile_pity_table(rates, name: str = "") -> PityTable:
+    """Compila BannerRates a PityTable y valida los umbrales (lanza ValueError)."""
+    five_at = int(rates.hard_pity["five_at"])
+    four_at = int(rates.hard_pity["four_at"])
+    if five_at < 1 or four_at < 1:
+        raise ValueError(f"Banner {name}: hard_pity debe ser >= 1")
+
+    five, four = [], []
+    for p5 in range(five_at):
+        for p4 in range(four_at):
+            t5, t4 = _thresholds(p4, p5, rates)
+            five.append(t5)
+            four.append(t4)
+    table = PityTable(five_at=five_at, four_at=four_at, five=tuple(five), four=tuple(four))
+
+    for p4 in range(four_at):
+        prev = 0.0
+        for p5 in range(five_at):
+            i = table.index(p4, p5)
+            t5, t4 = table.five[i], table.four[i]
+            if not (0.0 <= t5 <= t4 <= 1.0):
+                raise ValueError(f"Banner {name}: umbrales inválidos en pity4={p4}, pity5={p5}: {t5}, {t4}")
+            if t5 < prev:
+                raise ValueError(f"Banner {name}: probabilidad de 5★ no monótona en pity5={p5}")
+            prev = t5
+        if table.five[table.index(p4, five_at - 1)] != 1.0:
+            raise ValueError(f"Banner {name}: el hard pity de 5★ no garantiza 5★")
+    return table
\ No newline at end of file
@@ -0,0 +1,98 @@
+from collections import Counter
+from sqlalchemy import delete, func, select
+from ..db.models import PlayerStats, PlayerBannerStats, PullHistory
+from ..db.upsert import upsert
+
+# Contadores por jugador para rankings y logros: se leen O(1) filas por jugador
+# sin importar el tamaño de pull_history.
+
+def record_pulls(db, player_id: str, banner_key: str, rarities, now) -> int:
+    """
+    Suma un batch de tiradas a los contadores. Va dentro de la transacción de la tirada.
+    Devuelve el total de tiradas del jugador después del batch.
+    """
+    rarities = list(rarities)
+    ps = PlayerStats.__table__
+    total = db.execute(upsert(
+        ps, [ps.c.player_id],
+        lambda excluded: {
+            "total_pulls": ps.c.total_pulls + excluded.total_pulls,
+            "five_count": ps.c.five_count + excluded.five_count,
+            "four_count": ps.c.four_count + excluded.four_count,
+            "last_pull_at": excluded.last_pull_at,
+        },
+        values=dict(
+            player_id=player_id,
+            total_pulls=len(rarities),
+            five_count=rarities.count(5),
+            four_count=rarities.count(4),
+            last_pull_at=now,
+        ),
+    ).returning(ps.c.total_pulls)).scalar()
+
+    pbs = PlayerBannerStats.__table__
+    db.execute(upsert(
+        pbs, [pbs.c.player_id, pbs.c.banner_key],
+        lambda excluded: {"pulls": pbs.c.pulls + excluded.pulls},
+        values=dict(player_id=player_id, banner_key=banner_key, pulls=len(rarities)),
+    ))
+    return total
+
+def backfill(db, banner_keys) -> int:
+    """
+    Reconstruye player_stats y player_banner_stats desde pull_history.
+    banner_keys: banner id -> key (catálogo actual); las tiradas de banners que ya
+    no existen cuentan en el total pero no en ninguna key. Devuelve cuántos jugadores cargó.
+    """
+    db.execute(delete(PlayerBannerStats))
+    db.execute(delete(PlayerStats))
+
+    rows = db.execute(
+        select(
+            PullHistory.player_id,
+            func.count(),
+            func.count().filter(PullHistory.rarity == 5),
+            func.count().filter(PullHistory.rarity == 4),
+            func.max(PullHistory.ts),
+        ).group_by(PullHistory.player_id)
+    ).all()
+    if rows:
+        db.execute(PlayerStats.__table__.insert(), [
+            {"player_id": pid, "total_pulls": total, "five_count": five,
+             "four_count": four, "last_pull_at": last}
+            for pid, total, five, four, last in rows
+        ])
+
+    per_key = Counter()
+    for pid, bid, cnt in db.execute(
+        select(PullHistory.player_id, PullHistory.banner_id, func.count())
+        .group_by(PullHistory.player_id, PullHistory.banner_id)
+    ):
+        key = banner_keys.get(bid)
+        if key:
+            per_key[(pid, key)] += cnt
+    if per_key:
+        db.execute(PlayerBannerStats.__table__.insert(), [
+            {"player_id": pid, "banner_key": key, "pulls": n} for (pid, key), n in per_key.items()
+        ])
+    return len(rows)
+
+def backfill_if_empty(db, banner_keys) -> int | None:
+    """Corre el backfill solo la primera vez (tabla vacía con historial existente)."""
+    if db.execute(select(PlayerStats.player_id).limit(1)).first():
+        return None
+    if not db.execute(select(PullHistory.id).limit(1)).first():
+        return None
+    return backfill(db, banner_keys)
+
+if __name__ == "__main__":
+    # Reconstrucción manual: python -m src.services.player_stats
+    import time
+    from ..db.session import SessionLocal, init_db
+    from .data_loader import get_catalog
+    init_db()
+    t = time.perf_counter()
+    with SessionLocal() as db:
+        n = backfill(db, get_catalog().banner_key)
+        db.commit()
+    print(f"player_stats: {n} jugadores en {time.perf_counter() - t:.2f}s")
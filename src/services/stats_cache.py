@@ -0,0 +1,73 @@
+import heapq, time
+from dataclasses import dataclass
+
+@dataclass(frozen=True, slots=True)
+class GlobalStats:
+    users: int
+    pulls: int
+    five: int
+    four: int
+
+class StatsCache:
+    """
+    Métricas globales y top-k de /users en memoria.
+    Se carga entera desde la DB cada `ttl` segundos (load) y entre cargas se mantiene
+    con los eventos de tirada (apply_pulls), así que responder no depende del tamaño
+    de pull_history ni de la cantidad de jugadores.
+    """
+    def __init__(self, k: int, ttl: float):
+        self.k = k
+        self.ttl = ttl
+        self.global_stats: GlobalStats | None = None
+        self._top: dict[str, list] = {}   # uid -> [total, name]
+        self._loaded_at = 0.0
+
+    def is_stale(self) -> bool:
+        return self.global_stats is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def load(self, global_stats: GlobalStats, top_rows):
+        """top_rows: (name, uid, total) ordenados por total desc, hasta k filas."""
+        self.global_stats = global_stats
+        self._top = {uid: [total, name] for name, uid, total in top_rows}
+        self._loaded_at = time.monotonic()
+
+    def add_player(self, uid: str, name: str):
+        """Jugador nuevo: suma al total y, si hay lugar en el top, entra con 0 tiradas."""
+        if self.global_stats is None:
+            return
+        g = self.global_stats
+        self.global_stats = GlobalStats(g.users + 1, g.pulls, g.five, g.four)
+        if len(self._top) < self.k:
+            self._top.setdefault(uid, [0, name])
+
+    def apply_pulls(self, uid: str, rarities, total: int):
+        """Suma un batch de tiradas. `total` es absoluto (viene de player_stats), así que es idempotente en el top."""
+        if self.global_stats is None:
+            return
+        g = self.global_stats
+        # Si el batch cae en medio de un load puede contarse dos veces en los globales; el próximo load lo corrige
+        self.global_stats = GlobalStats(
+            g.users, g.pulls + len(rarities),
+            g.five + rarities.count(5), g.four + rarities.count(4),
+        )
+
+        entry = self._top.get(uid)
+        if entry is not None:
+            entry[0] = max(entry[0], total)
+        elif len(self._top) < self.k:
+            self._top[uid] = [total, None]
+        else:
+            low_uid = min(self._top, key=lambda u: self._top[u][0])
+            if total > self._top[low_uid][0]:
+                del self._top[low_uid]
+                self._top[uid] = [total, None]
+
+    def top(self, n: int) -> list[tuple[str | None, str, int]]:
+        """(name, uid, total) de los n primeros; name es None si entró por evento y falta resolverlo."""
+        best = heapq.nlargest(n, self._top.items(), key=lambda kv: kv[1][0])
+        return [(name, uid, total) for uid, (total, name) in best]
+
+    def set_names(self, names: dict[str, str]):
+        for uid, name in names.items():
+            if uid in self._top:
+                self._top[uid][1] = name
@@ -105,43 +105,42 @@ def make_history_embed(
 
 # ---------- INVENTORY ------------
 
-def make_inventory_embeds(
+INVENTORY_PER_PAGE = 25
+
+def sort_inventory_entries(entries: list[dict]) -> list[dict]:
+    # Orden: rareza desc, nombre asc
+    return sorted(entries, key=lambda x: (-x["rarity"], x["name"]))
+
+def inventory_page_count(n_entries: int, items_per_page: int = INVENTORY_PER_PAGE) -> int:
+    return max(1, (n_entries + items_per_page - 1) // items_per_page)
+
+def make_inventory_page(
     owner: discord.abc.User | discord.Member,
-    entries: list[dict],
+    items: list[dict],
+    page_index: int,
     *,
     title_prefix: str = "Inventario de",
     color: int = 0x90cdf4,
-    items_per_page: int = 25,
-) -> list[discord.Embed]:
-    # Orden: rareza desc, nombre asc
-    items = sorted(entries, key=lambda x: (-x["rarity"], x["name"]))
+    items_per_page: int = INVENTORY_PER_PAGE,
+) -> discord.Embed:
+    """Arma solo la página `page_index` de `items` (ya ordenados con sort_inventory_entries)."""
+    start = page_index * items_per_page
 
     # Armamos líneas
     lines: list[str] = []
-    for it in items:
+    for it in items[start:start + items_per_page]:
         stars = "★" * it["rarity"] if it["rarity"] else ""
         prefix = "[Character]" if it["kind"] == "char" else "[Light Cone]"
         badge  = f" • {it['badge']}" if it.get("badge") else ""
         # mostramos también copias totales entre paréntesis, útil para debug
         lines.append(f"{prefix}{stars} **{it['name']}**{badge}  (copias: {it['count']})")
 
-    # paginado como ya lo tenías
-    pages: list[list[str]] = []
-    for i in range(0, len(lines), items_per_page):
-        pages.append(lines[i:i + items_per_page])
-    if not pages:
-        pages = [[]]
-
-    embeds: list[discord.Embed] = []
-    total = len(pages)
-    for i, page in enumerate(pages, start=1):
-        title = f"{title_prefix} {owner.display_name}"
-        embed = discord.Embed(title=title, color=color)
-        try:
-            embed.set_author(name=str(owner), icon_url=owner.display_avatar.url)
-        except Exception:
-            embed.set_author(name=str(owner))
-        embed.description = "\n".join(page) if page else "_(sin objetos)_"
-        embed.set_footer(text=f"Página {i}/{total}")
-        embeds.append(embed)
-    return embeds
\ No newline at end of file
+    title = f"{title_prefix} {owner.display_name}"
+    embed = discord.Embed(title=title, color=color)
+    try:
+        embed.set_author(name=str(owner), icon_url=owner.display_avatar.url)
+    except Exception:
+        embed.set_author(name=str(owner))
+    embed.description = "\n".join(lines) if lines else "_(sin objetos)_"
+    embed.set_footer(text=f"Página {page_index + 1}/{inventory_page_count(len(items), items_per_page)}")
+    return embed
\ No newline at end of file
@@ -1,34 +1,151 @@
 import discord
-from ..db.session import SessionLocal
+from itertools import chain
+from typing import Callable
+from ..db.writer import run_write
 from ..db.models import Player
-from ..services.equipment_service import EquipmentService
+from ..services.data_loader import Catalog
+from ..services.equipment_service import EquipmentService, Ownership
+
+# Los ids se toman de los índices por path del catálogo (ya ordenados por favorito,
+# rareza y nombre) filtrados con un Ownership leído una sola vez por vista; solo se
+# arman las SelectOption de la página visible.
+
+# Máximo de opciones que admite un Select de Discord
+PAGE_SIZE = 25
+
+# ----------- ids ordenados -------------
+
+def character_ids(catalog: Catalog, owned: Ownership) -> list[str]:
+    return [cid for ids in catalog.chars_by_path.values() for cid in ids if cid in owned.chars]
+
+def light_cone_ids(catalog: Catalog, owned: Ownership, character_id: str) -> list[str]:
+    """LCs del path del personaje que posee el jugador: primero sus favoritos."""
+    c_path = catalog.char_meta[character_id][2]
+    favs = catalog.lc_favorites.get(character_id, ())
+    rest = (lid for lid in catalog.lcs_by_path.get(c_path, ()) if lid not in favs)
+    return [lid for lid in chain(favs, rest) if lid in owned.lcs]
+
+def equipped_character_ids(catalog: Catalog, equipped: dict[str, str]) -> list[str]:
+    return [cid for ids in catalog.chars_by_path.values() for cid in ids if cid in equipped]
+
+# ----------- opciones -------------
+
+def character_option(catalog: Catalog, cid: str) -> discord.SelectOption:
+    name, rarity, path = catalog.char_meta[cid]
+    return discord.SelectOption(
+        label=f"{name} ({rarity}★)"[:100],
+        value=cid,
+        description=f"Path: {path}"[:100]
+    )
+
+def light_cone_option(catalog: Catalog, character_id: str, equipped_lcs: set[str],
+                      lid: str) -> discord.SelectOption:
+    lname, rarity, lpath, favs = catalog.lc_meta[lid]
+    tag = " (equipado)" if lid in equipped_lcs else ""
+    fav = " ⭐" if character_id in favs else ""
+    return discord.SelectOption(
+        label=f"{lname}{fav}{tag}"[:100],
+        value=lid,
+        description=f"{rarity}★ • Path: {lpath} "[:100]
+    )
+
+def equipped_option(catalog: Catalog, equipped: dict[str, str], cid: str) -> discord.SelectOption:
+    cname, crarity, cpath = catalog.char_meta.get(cid, (cid, 0, "?"))
+    lid = equipped[cid]
+    lname, lrarity, lpath, _ = catalog.lc_meta.get(lid, (lid, 0, "?", set()))
+
+    label = f"{cname} ({crarity}★) ↔ {lname} ({lrarity}★)"
+    desc  = f"Path PJ: {cpath} • Path LC: {lpath}"
+
+    return discord.SelectOption(
+        label=label[:100],
+        value=cid,
+        description=desc[:100]
+    )
+
+# ----------- vista paginada -------------
+
+class _PagedSelectView(discord.ui.View):
+    """
+    Vista con un Select que recorre `ids` de a PAGE_SIZE con ◀️/▶️.
+    make_option(id) arma cada opción; _fill arma solo la página visible
+    (o empty_option si no hay ids).
+    """
+    def __init__(self, user_id: str, select: discord.ui.Select, ids: list[str],
+                 make_option: Callable[[str], discord.SelectOption],
+                 empty_option: discord.SelectOption,
+                 *, timeout: float = 180):
+        super().__init__(timeout=timeout)
+        self.user_id = user_id
+        self.ids = ids
+        self.make_option = make_option
+        self.empty_option = empty_option
+        self.page = 0
+        self.total_pages = max(1, (len(ids) + PAGE_SIZE - 1) // PAGE_SIZE)
+        self.select = select
+        self.base_placeholder = select.placeholder
+        self.add_item(select)
+        if self.total_pages == 1:
+            self.remove_item(self.prev_page)
+            self.remove_item(self.next_page)
+        self._fill()
+
+    def _fill(self):
+        start = self.page * PAGE_SIZE
+        visible = self.ids[start:start + PAGE_SIZE]
+        self.select.options = [self.make_option(i) for i in visible] or [self.empty_option]
+        if self.total_pages > 1:
+            self.select.placeholder = f"{self.base_placeholder} ({self.page + 1}/{self.total_pages})"
+        self.prev_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.total_pages - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if str(interaction.user.id) != self.user_id:
+            await interaction.response.send_message(
+                "No podés usar el menú de otra persona.", ephemeral=True
+            )
+            return False
+        return True
+
+    async def _turn(self, interaction: discord.Interaction, delta: int):
+        self.page = max(0, min(self.page + delta, self.total_pages - 1))
+        self._fill()
+        await interaction.response.edit_message(view=self)
+
+    @discord.ui.button(label="◀️", style=discord.ButtonStyle.secondary, row=1)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, -1)
+
+    @discord.ui.button(label="▶️", style=discord.ButtonStyle.secondary, row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, 1)
 
 # ----------- EquipSelect -------------
 
+def _equip(db, uid: str, cid: str, lid: str) -> str | None:
+    """Equipa y devuelve None, o el mensaje de error."""
+    p = db.get(Player, uid)
+    if not p:
+        return "Usá /register primero."
+
+    if not EquipmentService.owns_char(db, uid, cid):
+        return "Ya no poseés ese personaje."
+    if not EquipmentService.owns_lc(db, uid, lid):
+        return "Ya no poseés ese Light Cone."
+
+    EquipmentService.equip(db, uid, cid, lid)
+    return None
+
 class CharacterSelect(discord.ui.Select):
-    def __init__(self, user_id: str, char_ids: list[str],
-                 char_meta: dict[str, tuple[str,int,str]]):
+    def __init__(self, user_id: str, char_meta: dict[str, tuple[str,int,str]]):
         self.user_id = user_id
         self.char_meta = char_meta
 
-        opts = []
-        with SessionLocal() as db:
-            for cid in char_ids:
-                if EquipmentService.owns_char(db, user_id, cid):
-                    name, rarity, path = char_meta[cid]
-                    opts.append(discord.SelectOption(
-                        label=f"{name} ({rarity}★)"[:100],
-                        value=cid,
-                        description=f"Path: {path}"[:100]
-                    ))
-                if len(opts) >= 25:
-                    break
-
         super().__init__(
             placeholder="Elegí un personaje…",
             min_values=1, max_values=1,
-            options=opts,
-            custom_id="char_select"
+            custom_id="char_select",
+            row=0
         )
 
     async def callback(self, interaction: discord.Interaction):
@@ -37,14 +154,17 @@ class CharacterSelect(discord.ui.Select):
                 "No podés usar el menú de otra persona.", ephemeral=True
             )
         chosen_char = self.values[0]
+        if chosen_char == "__none__":
+            return await interaction.response.send_message(
+                "No tenés personajes para equipar.", ephemeral=True
+            )
         cname = self.char_meta[chosen_char][0]
 
         view = LightConeSelectView(
             user_id=self.user_id,
             character_id=chosen_char,
-            lc_ids=self.view.lc_ids,
-            lc_meta=self.view.lc_meta,
-            char_meta=self.view.char_meta
+            catalog=self.view.catalog,
+            owned=self.view.owned
         )
 
         await interaction.response.edit_message(
@@ -54,7 +174,6 @@ class CharacterSelect(discord.ui.Select):
 
 class LightConeSelect(discord.ui.Select):
     def __init__(self, user_id: str, character_id: str,
-                 lc_ids: list[str],
                  lc_meta: dict[str, tuple[str,int,str,set]],
                  char_meta: dict[str, tuple[str,int,str]]):
         self.user_id = user_id
@@ -62,39 +181,11 @@ class LightConeSelect(discord.ui.Select):
         self.lc_meta = lc_meta
         self.char_meta = char_meta
 
-        c_path = char_meta[character_id][2] 
-
-        opts = []
-        with SessionLocal() as db:
-            for lid in lc_ids:
-                if not EquipmentService.owns_lc(db, user_id, lid):
-                    continue
-                lname, rarity, lpath, favs = lc_meta[lid]
-                if lpath != c_path:
-                    continue
-                equipped = EquipmentService.equipped_for_lc(db, user_id, lid)
-                tag = " (equipado)" if equipped else ""
-                fav = " ⭐" if character_id in favs else ""
-                opts.append(discord.SelectOption(
-                    label=f"{lname}{fav}{tag}"[:100],
-                    value=lid,
-                    description=f"{rarity}★ • Path: {lpath} "[:100]
-                ))
-                if len(opts) >= 25:
-                    break
-
-        if not opts:
-            opts = [discord.SelectOption(
-                label="No tenés LCs compatibles",
-                value="__none__",
-                description="Consejo: fijate el Path."
-            )]
-
         super().__init__(
             placeholder="Elegí un Light Cone…",
             min_values=1, max_values=1,
-            options=opts,
-            custom_id="lc_select"
+            custom_id="lc_select",
+            row=0
         )
 
     async def callback(self, interaction: discord.Interaction):
@@ -112,18 +203,9 @@ class LightConeSelect(discord.ui.Select):
         uid = self.user_id
         cid = self.character_id
 
-        with SessionLocal() as db:
-            p = db.get(Player, uid)
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
-
-            if not EquipmentService.owns_char(db, uid, cid):
-                return await interaction.response.send_message("Ya no poseés ese personaje.", ephemeral=True)
-            if not EquipmentService.owns_lc(db, uid, lid):
-                return await interaction.response.send_message("Ya no poseés ese Light Cone.", ephemeral=True)
-
-            EquipmentService.equip(db, uid, cid, lid)
-            db.commit()
+        error = await run_write(_equip, uid, cid, lid)
+        if error:
+            return await interaction.response.send_message(error, ephemeral=True)
 
         cname = self.char_meta[cid][0]
         lname = self.lc_meta[lid][0]
@@ -132,87 +214,75 @@ class LightConeSelect(discord.ui.Select):
             view=None
         )
 
-class CharacterSelectView(discord.ui.View):
-    def __init__(self, user_id: str,
-                 char_ids, lc_ids,
-                 char_meta, lc_meta,
+class CharacterSelectView(_PagedSelectView):
+    def __init__(self, user_id: str, catalog: Catalog, owned: Ownership,
                  *, timeout: float = 180):
-        super().__init__(timeout=timeout)
-        
-        self.char_meta = char_meta
-        self.lc_meta = lc_meta
-        self.lc_ids = list(lc_ids)
-
-        self.add_item(CharacterSelect(
-            user_id=user_id,
-            char_ids=list(char_ids),
-            char_meta=char_meta
-        ))
+        super().__init__(
+            user_id,
+            CharacterSelect(user_id=user_id, char_meta=catalog.char_meta),
+            character_ids(catalog, owned),
+            lambda cid: character_option(catalog, cid),
+            discord.SelectOption(
+                label="No tenés personajes",
+                value="__none__",
+                description="Conseguilos con /pull."
+            ),
+            timeout=timeout
+        )
+        self.catalog = catalog
+        self.owned = owned
 
-class LightConeSelectView(discord.ui.View):
-    def __init__(self, user_id: str, character_id: str,
-                 lc_ids, lc_meta, char_meta,
+class LightConeSelectView(_PagedSelectView):
+    def __init__(self, user_id: str, character_id: str, catalog: Catalog, owned: Ownership,
                  *, timeout: float = 180):
-        super().__init__(timeout=timeout)
-        
-        self.char_meta = char_meta
-        self.lc_meta = lc_meta
-        self.lc_ids = list(lc_ids)
-
-        self.add_item(LightConeSelect(
-            user_id=user_id,
-            character_id=character_id,
-            lc_ids=list(lc_ids),
-            lc_meta=lc_meta,
-            char_meta=char_meta
-        ))
-        
+        equipped_lcs = set(owned.equipped.values())
+        super().__init__(
+            user_id,
+            LightConeSelect(
+                user_id=user_id,
+                character_id=character_id,
+                lc_meta=catalog.lc_meta,
+                char_meta=catalog.char_meta
+            ),
+            light_cone_ids(catalog, owned, character_id),
+            lambda lid: light_cone_option(catalog, character_id, equipped_lcs, lid),
+            discord.SelectOption(
+                label="No tenés LCs compatibles",
+                value="__none__",
+                description="Consejo: fijate el Path."
+            ),
+            timeout=timeout
+        )
+        self.catalog = catalog
+        self.character_id = character_id
+
 # ----------- UnequipSelect -------------
 
+def _unequip(db, uid: str, cid: str) -> str | None:
+    """Desequipa y devuelve None, o el mensaje de error."""
+    p = db.get(Player, uid)
+    if not p:
+        return "Usá /register primero."
+
+    ok = EquipmentService.unequip(db, uid, cid)
+    if not ok:
+        return "Ese personaje no tiene LC equipado."
+    return None
+
 class UnequipCharacterSelect(discord.ui.Select):
     def __init__(
         self,
         user_id: str,
-        char_ids: list[str],
         char_meta: dict[str, tuple[str,int,str]],
-        lc_meta: dict[str, tuple[str,int,str,set]],
     ):
         self.user_id = user_id
         self.char_meta = char_meta
-        self.lc_meta = lc_meta
-
-        opts = []
-        with SessionLocal() as db:
-            for cid in char_ids:
-                row = EquipmentService.equipped_for_char(db, user_id, cid)
-                if row:
-                    cname, crarity, cpath = char_meta.get(cid, (cid, 0, "?"))
-                    lid = row.light_cone_id
-                    lname, lrarity, lpath, _ = lc_meta.get(lid, (lid, 0, "?", set()))
-
-                    label = f"{cname} ({crarity}★) ↔ {lname} ({lrarity}★)"
-                    desc  = f"Path PJ: {cpath} • Path LC: {lpath}"
-
-                    opts.append(discord.SelectOption(
-                        label=label[:100],
-                        value=cid,
-                        description=desc[:100]
-                    ))
-                if len(opts) >= 25:
-                    break
-
-        if not opts:
-            opts = [discord.SelectOption(
-                label="No tenés personajes con LC equipado",
-                value="__none__",
-                description="Usá /equipment para ver tus emparejamientos."
-            )]
 
         super().__init__(
             placeholder="Elegí el personaje al que querés quitar el LC…",
             min_values=1, max_values=1,
-            options=opts,
-            custom_id="unequip_char_select"
+            custom_id="unequip_char_select",
+            row=0
         )
 
     async def callback(self, interaction: discord.Interaction):
@@ -228,15 +298,9 @@ class UnequipCharacterSelect(discord.ui.Select):
             )
 
         uid = self.user_id
-        with SessionLocal() as db:
-            p = db.get(Player, uid)
-            if not p:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
-
-            ok = EquipmentService.unequip(db, uid, cid)
-            if not ok:
-                return await interaction.response.send_message("Ese personaje no tiene LC equipado.", ephemeral=True)
-            db.commit()
+        error = await run_write(_unequip, uid, cid)
+        if error:
+            return await interaction.response.send_message(error, ephemeral=True)
 
         cname = self.char_meta.get(cid, (cid, 0, "?"))[0]
         await interaction.response.edit_message(
@@ -244,21 +308,25 @@ class UnequipCharacterSelect(discord.ui.Select):
             view=None
         )
 
-class UnequipCharacterSelectView(discord.ui.View):
+class UnequipCharacterSelectView(_PagedSelectView):
     def __init__(
         self,
         user_id: str,
-        char_ids: list[str],
-        char_meta: dict[str, tuple[str,int,str]],
-        lc_meta: dict[str, tuple[str,int,str,set]],
+        catalog: Catalog,
+        equipped: dict[str, str],
         *, timeout: float = 180
     ):
-        super().__init__(timeout=timeout)
-        self.char_meta = char_meta
-        self.lc_meta = lc_meta
-        self.add_item(UnequipCharacterSelect(
-            user_id=user_id,
-            char_ids=list(char_ids),
-            char_meta=char_meta,
-            lc_meta=lc_meta
-        ))
\ No newline at end of file
+        super().__init__(
+            user_id,
+            UnequipCharacterSelect(user_id=user_id, char_meta=catalog.char_meta),
+            equipped_character_ids(catalog, equipped),
+            lambda cid: equipped_option(catalog, equipped, cid),
+            discord.SelectOption(
+                label="No tenés personajes con LC equipado",
+                value="__none__",
+                description="Usá /equipment para ver tus emparejamientos."
+            ),
+            timeout=timeout
+        )
+        self.catalog = catalog
+        self.equipped = equipped
@@ -1,7 +1,14 @@
 import discord
-from ...db.session import SessionLocal
+from ...db.writer import run_write
 from ...db.models import GachaState
 
+def _set_banner(db, uid: str, banner_id: str) -> bool:
+    gs = db.get(GachaState, uid)
+    if not gs:
+        return False
+    gs.banner_id = banner_id
+    return True
+
 class BannerSelect(discord.ui.Select):
     def __init__(self, user_id: str, gs, *, max_options: int = 25):
         """
@@ -56,12 +63,8 @@ class BannerSelect(discord.ui.Select):
             )
 
         b = self.gs.banners[chosen]
-        with SessionLocal() as db:
-            gs = db.get(GachaState, self.user_id)
-            if not gs:
-                return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
-            gs.banner_id = chosen
-            db.commit()
+        if not await run_write(_set_banner, self.user_id, chosen):
+            return await interaction.response.send_message("Usá /register primero.", ephemeral=True)
 
         kind = "Star Rail Pass" if b.key == "star_rail_pass" else "Star Rail Special Pass"
         await interaction.response.edit_message(
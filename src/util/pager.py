@@ -1,23 +1,52 @@
+import os
+from collections import OrderedDict
 import discord
 
+# Páginas ya armadas que guarda cada Pager (las más recientes)
+PAGER_CACHE_PAGES = int(os.getenv("PAGER_CACHE_PAGES", "3"))
+
 class Pager(discord.ui.View):
     """
-    Paginador genérico para listas de embeds.
+    Paginador genérico con páginas a demanda.
+    get_page(index) -> embed (async) arma solo la página pedida; se guardan las últimas
+    `cache_size` en un LRU, así que la memoria no depende de la cantidad de páginas.
+    Crear con `await Pager.open(...)`, que además devuelve el embed de la primera página.
     """
-    def __init__(self, user_id: str, embeds: list[discord.Embed], timeout: float = 180):
+    def __init__(self, user_id: str, get_page, total_pages: int,
+                 timeout: float = 180, cache_size: int = PAGER_CACHE_PAGES):
         super().__init__(timeout=timeout)
         self.user_id = user_id
-        self.embeds = embeds
+        self.get_page = get_page
+        self.total_pages = max(1, total_pages)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[int, discord.Embed] = OrderedDict()
         self.index = 0
         self._update()
 
+    @classmethod
+    async def open(cls, user_id: str, get_page, count_pages, **kwargs):
+        """count_pages() -> cantidad de páginas (async). Devuelve (pager, embed de la página 0)."""
+        pager = cls(user_id, get_page, await count_pages(), **kwargs)
+        return pager, await pager.page(0)
+
+    async def page(self, index: int) -> discord.Embed:
+        embed = self._cache.get(index)
+        if embed is None:
+            embed = await self.get_page(index)
+            self._cache[index] = embed
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(index)
+        return embed
+
     def _update(self):
         for child in self.children:
             if isinstance(child, discord.ui.Button):
-                if child.custom_id == "prev":
+                if child.custom_id in ("first", "prev"):
                     child.disabled = self.index <= 0
-                elif child.custom_id == "next":
-                    child.disabled = self.index >= len(self.embeds) - 1
+                elif child.custom_id in ("next", "last"):
+                    child.disabled = self.index >= self.total_pages - 1
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if str(interaction.user.id) != self.user_id:
@@ -28,21 +57,25 @@ class Pager(discord.ui.View):
             return False
         return True
 
-    async def _show(self, interaction: discord.Interaction):
+    async def _show(self, interaction: discord.Interaction, index: int):
+        index = max(0, min(index, self.total_pages - 1))
+        embed = await self.page(index)
+        self.index = index
         self._update()
-        await interaction.response.edit_message(
-            embed=self.embeds[self.index],
-            view=self
-        )
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="⏮️", style=discord.ButtonStyle.secondary, custom_id="first")
+    async def first_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, 0)
 
     @discord.ui.button(label="⬅️ Anterior", style=discord.ButtonStyle.secondary, custom_id="prev")
     async def prev_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.index > 0:
-            self.index -= 1
-        await self._show(interaction)
+        await self._show(interaction, self.index - 1)
 
     @discord.ui.button(label="Siguiente ➡️", style=discord.ButtonStyle.secondary, custom_id="next")
     async def next_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.index < len(self.embeds) - 1:
-            self.index += 1
-        await self._show(interaction)
+        await self._show(interaction, self.index + 1)
+
+    @discord.ui.button(label="⏭️", style=discord.ButtonStyle.secondary, custom_id="last")
+    async def last_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.total_pages - 1)
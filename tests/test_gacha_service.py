@@ -0,0 +1,76 @@
+import random
+import pytest
+from src.services.data_loader import build_catalog
+from src.services.gacha_service import GachaService
+
+@pytest.fixture(scope="module")
+def gs():
+    c = build_catalog(use_snapshot=False)
+    return GachaService(c.characters, c.light_cones, c.banners)
+
+def _sequential(gs, banner_id, count, pity4, pity5, last_feat):
+    """Referencia: una tirada por vez con roll_rarity + choose_item, como el loop original."""
+    draws = []
+    for _ in range(count):
+        rarity = gs.roll_rarity(banner_id, pity4, pity5)
+        item_id, item_type, item, is_feat = gs.choose_item(banner_id, rarity, last_feat)
+        pity4 = 0 if rarity >= 4 else pity4 + 1
+        pity5 = 0 if rarity >= 5 else pity5 + 1
+        if rarity == 5:
+            last_feat = is_feat
+        draws.append((rarity, item_id, item_type, item))
+    return draws, pity4, pity5, last_feat
+
+@pytest.mark.parametrize("banner_id", ["stellar_warp", "event_warp_1_seele"])
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("state", [(0, 0, True), (8, 70, False), (9, 89, False), (3, 120, True)])
+def test_draw_batch_matches_sequential(gs, banner_id, seed, state):
+    random.seed(seed)
+    batch = gs.draw_batch(banner_id, 100, *state)
+    random.seed(seed)
+    assert batch == _sequential(gs, banner_id, 100, *state)
+
+def test_draw_batch_resets_pity_at_hard_pity(gs):
+    table = gs.pity_tables["event_warp_1_seele"]
+    random.seed(1)
+    draws, pity4, pity5, _ = gs.draw_batch(
+        "event_warp_1_seele", 2, table.four_at - 1, table.five_at - 1, False
+    )
+    # la primera es 5★ garantizado y featured (se había perdido el 50/50)
+    assert draws[0][0] == 5
+    assert draws[0][1] in {cid for cid, _, _ in gs.tables["event_warp_1_seele"].five_featured}
+    assert pity5 == (0 if draws[1][0] == 5 else 1)
+    assert pity4 == (0 if draws[1][0] >= 4 else 1)
+
+def _expected_counts(table, count, pity4, pity5):
+    """Cantidad esperada de 5★/4★/3★ en `count` tiradas, recorriendo la cadena de pity con probs()."""
+    expected = {5: 0.0, 4: 0.0, 3: 0.0}
+    states = {(pity4, pity5): 1.0}
+    for _ in range(count):
+        nxt = {}
+        for (p4, p5), w in states.items():
+            q5, q4, q3 = table.probs(p4, p5)
+            expected[5] += w * q5; expected[4] += w * q4; expected[3] += w * q3
+            for state, q in (((0, 0), q5), ((0, p5 + 1), q4), ((p4 + 1, p5 + 1), q3)):
+                if q:
+                    nxt[state] = nxt.get(state, 0.0) + w * q
+        states = nxt
+    return expected
+
+@pytest.mark.parametrize("banner_id", ["stellar_warp", "event_warp_1_seele"])
+@pytest.mark.parametrize("state", [(0, 0), (8, 70)])
+def test_draw_batch_distribution_matches_pity_table(gs, banner_id, state):
+    # draw_batch es una API de lote (una tirada por vez, sin vectorizar): las rarezas
+    # tienen que seguir la distribución exacta de la tabla de pity del banner
+    count, runs = 20, 5000
+    expected = _expected_counts(gs.pity_tables[banner_id], count, *state)
+    random.seed(1234)
+    per_run = {5: [], 4: [], 3: []}
+    for _ in range(runs):
+        draws, *_ = gs.draw_batch(banner_id, count, *state, True)
+        for r in per_run:
+            per_run[r].append(sum(1 for d in draws if d[0] == r))
+    for r, counts in per_run.items():
+        mean = sum(counts) / runs
+        sd = (sum((c - mean) ** 2 for c in counts) / (runs - 1)) ** 0.5
+        assert abs(mean - expected[r]) <= 4 * sd / runs ** 0.5 + 1e-9, (r, mean, expected[r])